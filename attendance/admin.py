@@ -1,29 +1,114 @@
+from functools import reduce
+from operator import or_
+
 from django.contrib import admin
-from .models import UserProfile, MakeUpClass, RemedialCode, MakeUpAttendance
+from django.db.models import Q
+
+from .models import (
+    UserProfile, MakeUpClass, RemedialCode, MakeUpAttendance,
+    ArchivedMakeUpClass, ArchivedRemedialCode, ArchivedMakeUpAttendance,
+)
+from .pagination import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows: estimated counts on
+    the unfiltered list, no second COUNT(*) for "N results (M total)", a date
+    hierarchy that probes the index instead of scanning (attendance_admin
+    tags), and prefix searches (see lookups.py) instead of icontains scans.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/attendance/large_change_list.html'
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match the whole term against search_fields, which must spell out
+        their lookups. Fields behind a foreign key are searched in a subquery
+        on the related table (student_id IN (SELECT ...)), so the OR never
+        spans a join and this table is only probed through the key's index.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        lookups_by_field = {}
+        for lookup in self.get_search_fields(request):
+            field_name, _, rest = lookup.partition('__')
+            lookups_by_field.setdefault(field_name, []).append(rest)
+        matches = []
+        for field_name, lookups in lookups_by_field.items():
+            field = self.model._meta.get_field(field_name)
+            if field.is_relation:
+                related = field.related_model._default_manager.filter(
+                    reduce(or_, (Q(**{lookup: term}) for lookup in lookups)))
+                matches.append(Q(**{f'{field_name}__in': related.values('pk')}))
+            else:
+                matches += [Q(**{f'{field_name}__{lookup}': term}) for lookup in lookups]
+        return queryset.filter(reduce(or_, matches)), False
 
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'role', 'registration_number', 'department']
     list_filter = ['role']
+    list_select_related = ['user']
     search_fields = ['user__username', 'user__first_name', 'registration_number']
+    raw_id_fields = ['user']
 
 
 @admin.register(MakeUpClass)
 class MakeUpClassAdmin(admin.ModelAdmin):
     list_display = ['subject', 'faculty', 'date', 'start_time', 'venue', 'status']
     list_filter = ['status', 'date']
+    list_select_related = ['faculty']
     search_fields = ['subject', 'faculty__first_name']
+    autocomplete_fields = ['faculty']
+    date_hierarchy = 'date'
 
 
 @admin.register(RemedialCode)
-class RemedialCodeAdmin(admin.ModelAdmin):
+class RemedialCodeAdmin(LargeTableAdmin):
     list_display = ['code', 'makeup_class', 'is_active', 'created_at', 'expires_at']
     list_filter = ['is_active']
+    list_select_related = ['makeup_class__faculty']
+    search_fields = ['code__prefix']
+    search_help_text = "Code, starting with the characters entered (case-sensitive)"
+    raw_id_fields = ['makeup_class', 'created_by']
 
 
 @admin.register(MakeUpAttendance)
-class MakeUpAttendanceAdmin(admin.ModelAdmin):
+class MakeUpAttendanceAdmin(LargeTableAdmin):
     list_display = ['student', 'makeup_class', 'is_present', 'marked_at']
     list_filter = ['is_present', 'marked_at']
-    search_fields = ['student__first_name', 'student__username']
+    list_select_related = ['student', 'makeup_class__faculty']
+    search_fields = ['student__username__prefix', 'student__profile__registration_number__prefix']
+    search_help_text = "Username or registration number, starting with the characters entered (case-sensitive)"
+    autocomplete_fields = ['student']
+    raw_id_fields = ['makeup_class', 'remedial_code_used']
+    date_hierarchy = 'marked_at'
+
+
+@admin.register(ArchivedMakeUpClass)
+class ArchivedMakeUpClassAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'faculty', 'date', 'venue', 'present_count', 'archived_at']
+    list_select_related = ['faculty']
+    search_fields = ['subject']
+    raw_id_fields = ['faculty']
+    date_hierarchy = 'date'
+
+
+@admin.register(ArchivedRemedialCode)
+class ArchivedRemedialCodeAdmin(LargeTableAdmin):
+    list_display = ['code', 'makeup_class', 'created_at', 'expires_at']
+    list_select_related = ['makeup_class']
+    search_fields = ['code__prefix']
+    raw_id_fields = ['makeup_class', 'created_by']
+
+
+@admin.register(ArchivedMakeUpAttendance)
+class ArchivedMakeUpAttendanceAdmin(LargeTableAdmin):
+    list_display = ['student', 'makeup_class', 'is_present', 'marked_at']
+    list_select_related = ['student', 'makeup_class']
+    search_fields = ['student__username__prefix', 'student__profile__registration_number__prefix']
+    raw_id_fields = ['student', 'makeup_class', 'remedial_code_used']
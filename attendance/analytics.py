@@ -0,0 +1,171 @@
+"""
+Attendance reporting: rates per class, faculty, department, subject and week,
+and students falling below a threshold.
+
+There is no enrolment table, so a class's audience is taken to be the
+students of its faculty's department, and
+
+    attendance rate = present marks / (classes x students in that department)
+
+Every breakdown is one GROUP BY per store (live and archived classes),
+grouped by the breakdown key and the faculty's department; the
+per-department audience is then folded in over those few result rows.
+Present marks come from ClassAttendanceSummary, or the present_count an
+archived class keeps, so no query touches the attendance tables except the
+per-student ones. A report can be limited to one faculty's classes (what
+faculty who are not staff get). Reports are cached for
+ANALYTICS_CACHE_SECONDS.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncWeek
+from django.utils import timezone
+
+from .models import MakeUpClass, UserProfile, ArchivedMakeUpClass, ArchivedMakeUpAttendance
+
+CACHE_SECONDS = getattr(settings, 'ANALYTICS_CACHE_SECONDS', 15 * 60)
+DEFAULT_THRESHOLD = getattr(settings, 'ANALYTICS_LOW_ATTENDANCE_THRESHOLD', 0.75)
+DEFAULT_DAYS = 30
+
+DEPARTMENT = 'faculty__profile__department'
+
+
+def _rate(present, expected):
+    return round(present / expected, 4) if expected else None
+
+
+def _department_sizes():
+    return dict(UserProfile.objects.filter(role='student').values('department')
+                .annotate(students=Count('pk')).values_list('department', 'students'))
+
+
+def _class_sets(date_from, date_to, faculty=None):
+    """(classes, present count field) for the live and the archive store"""
+    live = MakeUpClass.objects.filter(date__gte=date_from, date__lte=date_to).exclude(status='cancelled')
+    archived = ArchivedMakeUpClass.objects.filter(date__gte=date_from, date__lte=date_to)
+    if faculty is not None:
+        live, archived = live.filter(faculty_id=faculty), archived.filter(faculty_id=faculty)
+    return (live, 'attendance_summary__present_count'), (archived, 'present_count')
+
+
+def _grouped(class_sets, sizes, *fields):
+    """
+    One GROUP BY (fields + faculty department) over each store's classes,
+    folded back to one row per fields with classes, present, expected and
+    rate.
+    """
+    rows = [
+        row
+        for classes, present_field in class_sets
+        for row in classes.values(*fields, DEPARTMENT).annotate(
+            classes=Count('pk'), present=Coalesce(Sum(present_field), 0),
+        ).order_by()
+    ]
+    folded = {}
+    for row in rows:
+        key = tuple(row[field] for field in fields)
+        entry = folded.setdefault(key, {**{field: row[field] for field in fields},
+                                        'classes': 0, 'present': 0, 'expected': 0})
+        entry['classes'] += row['classes']
+        entry['present'] += row['present']
+        entry['expected'] += row['classes'] * sizes.get(row[DEPARTMENT] or '', 0)
+    for entry in folded.values():
+        entry['rate'] = _rate(entry['present'], entry['expected'])
+    return sorted(folded.values(), key=lambda entry: (entry['rate'] is None, -(entry['rate'] or 0)))
+
+
+def _rename(rows, **names):
+    for row in rows:
+        for old, new in names.items():
+            row[new] = row.pop(old)
+    return rows
+
+
+def build_report(date_from, date_to, threshold=DEFAULT_THRESHOLD, faculty=None):
+    """Report over the classes dated in the range; faculty (a user id) limits it to theirs"""
+    class_sets = _class_sets(date_from, date_to, faculty)
+    sizes = _department_sizes()
+
+    per_class = []
+    for classes, present_field in class_sets:
+        for row in classes.values('pk', 'subject', 'date', 'faculty__username', DEPARTMENT).annotate(
+                present=Coalesce(present_field, 0)).order_by():
+            audience = sizes.get(row[DEPARTMENT] or '', 0)
+            per_class.append({
+                'id': row['pk'], 'subject': row['subject'], 'date': row['date'],
+                'faculty': row['faculty__username'], 'department': row[DEPARTMENT] or '',
+                'present': row['present'], 'expected': audience, 'rate': _rate(row['present'], audience),
+            })
+    per_class.sort(key=lambda entry: (entry['date'], entry['id']), reverse=True)
+
+    per_department = _rename(_grouped(class_sets, sizes, DEPARTMENT), **{DEPARTMENT: 'department'})
+    for entry in per_department:
+        entry['department'] = entry['department'] or ''
+        entry['students'] = sizes.get(entry['department'], 0)
+
+    # Classes held for each department bound every student's possible attendance
+    held = {entry['department']: entry['classes'] for entry in per_department}
+    attended = Q(
+        user__makeup_attendance__makeup_class__date__gte=date_from,
+        user__makeup_attendance__makeup_class__date__lte=date_to,
+    )
+    archived = ArchivedMakeUpAttendance.objects.filter(
+        makeup_class__date__gte=date_from, makeup_class__date__lte=date_to,
+    )
+    if faculty is not None:
+        attended &= Q(user__makeup_attendance__makeup_class__faculty_id=faculty)
+        archived = archived.filter(makeup_class__faculty_id=faculty)
+    students = UserProfile.objects.filter(role='student').values(
+        'user_id', 'user__username', 'registration_number', 'department',
+    ).annotate(attended=Count('user__makeup_attendance', filter=attended))
+    archived = dict(archived.values('student_id').annotate(attended=Count('pk')).order_by().values_list('student_id', 'attended'))
+    below = []
+    for row in students:
+        row['attended'] += archived.get(row['user_id'], 0)
+        possible = held.get(row['department'], 0)
+        rate = _rate(row['attended'], possible)
+        if rate is not None and rate < threshold:
+            below.append({
+                'id': row['user_id'], 'username': row['user__username'],
+                'registration_number': row['registration_number'] or '', 'department': row['department'],
+                'attended': row['attended'], 'possible': possible, 'rate': rate,
+            })
+    below.sort(key=lambda entry: (entry['rate'], entry['username']))
+
+    return {
+        'generated_at': timezone.now(),
+        'date_from': date_from,
+        'date_to': date_to,
+        'threshold': threshold,
+        'faculty': faculty,
+        'per_class': per_class,
+        'per_faculty': _rename(
+            _grouped(class_sets, sizes, 'faculty_id', 'faculty__username'), faculty__username='faculty',
+        ),
+        'per_department': per_department,
+        'per_subject': _grouped(class_sets, sizes, 'subject'),
+        'per_week': sorted(_grouped([(classes.annotate(week=TruncWeek('date')), present_field)
+                                     for classes, present_field in class_sets], sizes, 'week'),
+                           key=lambda entry: entry['week']),
+        'students_below_threshold': below,
+    }
+
+
+def _cache_key(date_from, date_to, threshold, faculty):
+    scope = 'all' if faculty is None else faculty
+    return f'analytics:{scope}:{date_from.isoformat()}:{date_to.isoformat()}:{threshold}'
+
+
+def get_report(date_from=None, date_to=None, threshold=DEFAULT_THRESHOLD, faculty=None, refresh=False):
+    """The cached report for the range (default: the last 30 days), rebuilt when stale or refresh=True"""
+    date_to = date_to or timezone.localdate()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_DAYS - 1)
+    key = _cache_key(date_from, date_to, threshold, faculty)
+    report = None if refresh else cache.get(key)
+    if report is None:
+        report = build_report(date_from, date_to, threshold, faculty)
+        cache.set(key, report, CACHE_SECONDS)
+    return report
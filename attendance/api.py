@@ -0,0 +1,202 @@
+"""
+Read-only JSON API for the mobile app.
+
+Rows are serialised straight from values() and paged with keyset cursors
+('after'/'before', as on the HTML listings). Every endpoint supports
+conditional GET: the ETag and Last-Modified come from the attendance
+summary tables (one small query) and the fragment cache stamps, so an
+unchanged poll gets a 304 without the listing query ever running. Clients
+should send If-None-Match: Last-Modified only moves with new marks and
+classes, not with edits.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, F, Max
+from django.db.models.functions import Coalesce
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from django.views.decorators.http import condition, require_GET
+
+from . import archive, fragments
+from .models import MakeUpClass, MakeUpAttendance, StudentAttendanceSummary, ClassAttendanceSummary
+from .pagination import keyset_paginate
+
+MAX_PAGE_SIZE = 100
+
+
+def api_login_required(view):
+    """login_required that answers 401 instead of redirecting to the login page"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': "Authentication required."}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _role_required(role):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.role != role:
+                return JsonResponse({'error': f"Only {role} accounts can use this endpoint."}, status=403)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _versioned(version_func):
+    """
+    condition() that calls version_func(request, ...) once per request.
+    version_func returns (last_modified, parts) or None when there is nothing
+    to validate against; the ETag hashes parts with the query string.
+    """
+    def get_version(request, *args, **kwargs):
+        if not hasattr(request, '_api_version'):
+            request._api_version = version_func(request, *args, **kwargs)
+        return request._api_version
+
+    def etag(request, *args, **kwargs):
+        version = get_version(request, *args, **kwargs)
+        if version is None:
+            return None
+        raw = '|'.join(str(part) for part in (*version[1], request.GET.urlencode()))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        version = get_version(request, *args, **kwargs)
+        return version[0] if version else None
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def _page(queryset, key, request, parse, serialize):
+    try:
+        page_size = min(MAX_PAGE_SIZE, max(1, int(request.GET.get('limit', 25))))
+    except ValueError:
+        page_size = 25
+    page = keyset_paginate(queryset, key, request.GET, parse, page_size=page_size)
+    return JsonResponse({
+        'results': [serialize(row) for row in page],
+        'next': page.next_cursor or None,
+        'previous': page.previous_cursor or None,
+    })
+
+
+def _latest(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+# ──────────────────────────────────────────────
+#  Student: attendance history
+# ──────────────────────────────────────────────
+
+def _history_version(request):
+    summary = (StudentAttendanceSummary.objects.filter(student=request.user)
+               .values_list('present_count', 'last_marked_at').first()) or (0, None)
+    # The stamp moves when an attended class is edited
+    return summary[1], (*summary, fragments.stamp('student', request.user.pk))
+
+
+@require_GET
+@api_login_required
+@_role_required('student')
+@_versioned(_history_version)
+def my_attendance(request):
+    records = [queryset.values(
+        'pk', 'marked_at', 'is_present', 'makeup_class_id',
+        'makeup_class__subject', 'makeup_class__topic', 'makeup_class__date',
+        'makeup_class__start_time', 'makeup_class__end_time', 'makeup_class__venue',
+        'makeup_class__faculty__first_name', 'makeup_class__faculty__last_name',
+    ) for queryset in archive.history_querysets(request.user)]
+    return _page(records, 'marked_at', request, parse_datetime, lambda row: {
+        'id': row['pk'],
+        'marked_at': row['marked_at'],
+        'is_present': row['is_present'],
+        'class': {
+            'id': row['makeup_class_id'],
+            'subject': row['makeup_class__subject'],
+            'topic': row['makeup_class__topic'],
+            'date': row['makeup_class__date'],
+            'start_time': row['makeup_class__start_time'],
+            'end_time': row['makeup_class__end_time'],
+            'venue': row['makeup_class__venue'],
+            'faculty': f"{row['makeup_class__faculty__first_name']} {row['makeup_class__faculty__last_name']}".strip(),
+        },
+    })
+
+
+# ──────────────────────────────────────────────
+#  Faculty: classes with stats
+# ──────────────────────────────────────────────
+
+def _classes_version(request):
+    stats = MakeUpClass.objects.filter(faculty=request.user).aggregate(
+        classes=Count('pk'), created=Max('created_at'), marked=Max('attendance_summary__last_marked_at'),
+    )
+    # The stamp moves on class edits and code changes, which touch neither timestamp
+    return (_latest(stats['created'], stats['marked']),
+            (stats['classes'], stats['created'], stats['marked'], fragments.stamp('faculty', request.user.pk)))
+
+
+@require_GET
+@api_login_required
+@_role_required('faculty')
+@_versioned(_classes_version)
+def my_classes(request):
+    classes = MakeUpClass.objects.filter(faculty=request.user).values(
+        'pk', 'subject', 'topic', 'date', 'start_time', 'end_time', 'venue', 'status', 'created_at',
+        present_count=Coalesce('attendance_summary__present_count', 0),
+        last_marked_at=F('attendance_summary__last_marked_at'),
+    )
+    return _page(classes, ('date', 'start_time'), request, (parse_date, parse_time), lambda row: {
+        'id': row['pk'],
+        'subject': row['subject'],
+        'topic': row['topic'],
+        'date': row['date'],
+        'start_time': row['start_time'],
+        'end_time': row['end_time'],
+        'venue': row['venue'],
+        'status': row['status'],
+        'created_at': row['created_at'],
+        'stats': {'present_count': row['present_count'], 'last_marked_at': row['last_marked_at']},
+    })
+
+
+# ──────────────────────────────────────────────
+#  Faculty: class roster
+# ──────────────────────────────────────────────
+
+def _roster_version(request, pk):
+    summary = (ClassAttendanceSummary.objects.filter(makeup_class_id=pk, makeup_class__faculty=request.user)
+               .values_list('present_count', 'last_marked_at').first())
+    # No summary: not this faculty's class, or nobody marked yet; let the view decide
+    return (summary[1], summary) if summary else None
+
+
+@require_GET
+@api_login_required
+@_role_required('faculty')
+@_versioned(_roster_version)
+def class_roster(request, pk):
+    cls = get_object_or_404(MakeUpClass.objects.only('pk'), pk=pk, faculty=request.user)
+    records = MakeUpAttendance.objects.filter(makeup_class=cls).values(
+        'pk', 'marked_at', 'is_present', 'student_id', 'student__username',
+        'student__first_name', 'student__last_name', 'student__profile__registration_number',
+        'remedial_code_used__code',
+    )
+    return _page(records, 'marked_at', request, parse_datetime, lambda row: {
+        'id': row['pk'],
+        'marked_at': row['marked_at'],
+        'is_present': row['is_present'],
+        'code': row['remedial_code_used__code'],
+        'student': {
+            'id': row['student_id'],
+            'username': row['student__username'],
+            'name': f"{row['student__first_name']} {row['student__last_name']}".strip(),
+            'registration_number': row['student__profile__registration_number'] or '',
+        },
+    })
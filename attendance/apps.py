@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class AttendanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'attendance'
     verbose_name = 'LPU Attendance System'
+
+    def ready(self):
+        from . import db, lookups, signals  # noqa: F401 - registers the fragment cache receivers
+        connection_created.connect(db.configure_sqlite, dispatch_uid='attendance.configure_sqlite')
+        lookups.register()
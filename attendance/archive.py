@@ -0,0 +1,104 @@
+"""
+Moves old completed classes, with their codes and attendance, out of the
+live tables into the Archived* tables, so the hot paths (code lookup,
+marking, faculty listings) only ever see the current semester.
+
+Rows keep their ids, so archived and live records never clash and keyset
+cursors stay valid across both stores. Student attendance summaries keep
+counting archived marks; histories read from both stores (see
+history_querysets). Run it with `manage.py archive_semester`.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.functions import Coalesce
+
+from . import code_cache, db, fragments
+from .models import (
+    MakeUpClass, RemedialCode, MakeUpAttendance, ClassAttendanceSummary,
+    ArchivedMakeUpClass, ArchivedRemedialCode, ArchivedMakeUpAttendance,
+)
+
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_AFTER_DAYS = getattr(settings, 'ARCHIVE_AFTER_DAYS', 180)
+
+CLASS_FIELDS = ('id', 'faculty_id', 'subject', 'topic', 'date', 'start_time', 'end_time', 'venue',
+                'status', 'description', 'created_at')
+CODE_FIELDS = ('id', 'makeup_class_id', 'code', 'created_by_id', 'created_at', 'expires_at')
+ATTENDANCE_FIELDS = ('id', 'student_id', 'makeup_class_id', 'remedial_code_used_id', 'marked_at', 'is_present')
+
+
+def archivable(cutoff):
+    """Completed classes dated before cutoff"""
+    return MakeUpClass.objects.filter(status='completed', date__lt=cutoff)
+
+
+def _delete(model, field_name, ids):
+    """
+    DELETE FROM model WHERE field IN ids, without QuerySet.delete(): the
+    post_delete receivers would make it load and signal every row, and
+    archive_batch bumps the fragment stamps itself.
+    """
+    quote = connection.ops.quote_name
+    column = model._meta.get_field(field_name).column
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(column)} IN ({", ".join(["%s"] * len(ids))})',
+            list(ids),
+        )
+
+
+def archive_batch(class_ids):
+    """Move these classes and everything hanging off them; returns (classes, codes, attendance) moved"""
+    with transaction.atomic():
+        db.take_write_lock(MakeUpClass)
+        classes = list(MakeUpClass.objects.filter(pk__in=class_ids, status='completed').order_by().values(
+            *CLASS_FIELDS, present_count=Coalesce('attendance_summary__present_count', 0),
+        ))
+        class_ids = [row['id'] for row in classes]
+        if not class_ids:
+            return 0, 0, 0
+        codes = list(RemedialCode.objects.filter(makeup_class_id__in=class_ids).order_by()
+                     .values(*CODE_FIELDS, 'is_active'))
+        attendance = list(MakeUpAttendance.objects.filter(makeup_class_id__in=class_ids).order_by()
+                          .values(*ATTENDANCE_FIELDS))
+
+        ArchivedMakeUpClass.objects.bulk_create([ArchivedMakeUpClass(**row) for row in classes])
+        ArchivedRemedialCode.objects.bulk_create([
+            ArchivedRemedialCode(**{field: row[field] for field in CODE_FIELDS}) for row in codes
+        ])
+        code_ids = {row['id'] for row in codes}
+        for row in attendance:
+            # Only ever points at a code of another class after manual edits
+            if row['remedial_code_used_id'] not in code_ids:
+                row['remedial_code_used_id'] = None
+        ArchivedMakeUpAttendance.objects.bulk_create(
+            [ArchivedMakeUpAttendance(**row) for row in attendance], batch_size=1000,
+        )
+
+        # Children first, so no cascade has to be collected
+        _delete(MakeUpAttendance, 'makeup_class', class_ids)
+        _delete(RemedialCode, 'makeup_class', class_ids)
+        _delete(ClassAttendanceSummary, 'makeup_class', class_ids)
+        _delete(MakeUpClass, 'id', class_ids)
+
+    code_cache.invalidate_many((row['id'], row['code']) for row in codes if row['is_active'])
+    fragments.bump('faculty', *{row['faculty_id'] for row in classes})
+    fragments.bump('student', *{row['student_id'] for row in attendance})
+    return len(classes), len(codes), len(attendance)
+
+
+def archive_before(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """Archive every completed class dated before cutoff, one transaction per batch; yields batch totals"""
+    while True:
+        class_ids = list(archivable(cutoff).order_by().values_list('pk', flat=True)[:batch_size])
+        if not class_ids:
+            return
+        yield archive_batch(class_ids)
+
+
+def history_querysets(student):
+    """A student's attendance from the live and the archive store, for keyset_paginate"""
+    return (
+        MakeUpAttendance.objects.filter(student=student),
+        ArchivedMakeUpAttendance.objects.filter(student=student),
+    )
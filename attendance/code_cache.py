@@ -0,0 +1,107 @@
+"""
+Cache of currently valid remedial codes.
+
+Entries live in Django's cache framework (locmem unless CACHES says
+otherwise) under the code string and the code pk, and time out exactly when
+the code expires. Anything that deactivates a code must call invalidate().
+"""
+import math
+import threading
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+# Change when CachedCode's fields change, so old pickled entries are ignored
+KEY_PREFIX = 'remedial_code.v2'
+
+
+class CachedCode(namedtuple('CachedCode', [
+    'pk', 'code', 'makeup_class_id', 'faculty_id', 'subject', 'date', 'expires_at',
+])):
+    """Just enough of a RemedialCode to validate it and mark attendance"""
+    __slots__ = ()
+
+    def time_left(self):
+        return max(0, int((self.expires_at - timezone.now()).total_seconds()))
+
+    def is_valid(self):
+        return timezone.now() < self.expires_at
+
+
+_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0}
+
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+
+def stats():
+    """Hit/miss counters for this process"""
+    with _lock:
+        hits, misses = _counters['hits'], _counters['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+
+
+def _code_key(code):
+    return f'{KEY_PREFIX}:code:{code}'
+
+
+def _pk_key(pk):
+    return f'{KEY_PREFIX}:pk:{pk}'
+
+
+def _get(key):
+    entry = cache.get(key)
+    if entry is not None and entry.is_valid():
+        _count('hits')
+        return entry
+    _count('misses')
+    return None
+
+
+def get(code):
+    """Return the CachedCode for a valid code string, or None on a miss"""
+    return _get(_code_key(code))
+
+
+def get_by_pk(pk):
+    """Return the CachedCode for a valid code pk, or None on a miss"""
+    return _get(_pk_key(pk))
+
+
+def entry_for(code_obj):
+    return CachedCode(
+        pk=code_obj.pk,
+        code=code_obj.code,
+        makeup_class_id=code_obj.makeup_class_id,
+        faculty_id=code_obj.makeup_class.faculty_id,
+        subject=code_obj.makeup_class.subject,
+        date=code_obj.makeup_class.date,
+        expires_at=code_obj.expires_at,
+    )
+
+
+def put(code_obj):
+    """Cache a code until it expires; invalid codes are not cached"""
+    entry = entry_for(code_obj)
+    if code_obj.is_valid():
+        timeout = math.ceil((code_obj.expires_at - timezone.now()).total_seconds())
+        cache.set_many({_code_key(entry.code): entry, _pk_key(entry.pk): entry}, timeout)
+    return entry
+
+
+def invalidate(pk, code):
+    cache.delete_many([_code_key(code), _pk_key(pk)])
+
+
+def invalidate_many(codes):
+    """Drop cached entries for an iterable of (pk, code) pairs"""
+    keys = []
+    for pk, code in codes:
+        keys += [_code_key(code), _pk_key(pk)]
+    if keys:
+        cache.delete_many(keys)
@@ -0,0 +1,72 @@
+"""
+Per-connection database tuning.
+
+SQLite's defaults (rollback journal, synchronous=FULL) make every reader block
+the writer's commit, so bursts of mark_attendance requests queue behind page
+reads and fail with "database is locked". WAL lets readers and the single
+writer proceed together; synchronous=NORMAL is still crash-safe in WAL mode
+(a power cut can lose the last commits, never corrupt the file).
+"""
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+DEFAULT_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Milliseconds a writer waits for the lock before raising "database is locked"
+    'busy_timeout': 5000,
+}
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: apply SQLITE_PRAGMAS to every new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_SQLITE_PRAGMAS)
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def take_write_lock(model, using='default'):
+    """
+    Inside transaction.atomic(): take SQLite's database write lock now rather
+    than at the first write. A transaction that reads before it writes can't
+    upgrade its lock once another writer has committed (it fails at once
+    with "database is locked" instead of waiting out busy_timeout), and
+    holding the lock from the start means nothing is written between a read
+    and the write that depends on it. An UPDATE matching no rows is enough.
+    Other backends lock rows as they write them, so this does nothing there.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE {table} SET {pk} = {pk} WHERE 0')
+
+
+def estimate_row_count(model, using='default'):
+    """
+    The planner's row estimate for model's table, or None when there isn't one:
+    pg_class.reltuples on PostgreSQL, sqlite_stat1 (written by ANALYZE or
+    PRAGMA optimize) on SQLite. Constant time, unlike COUNT(*).
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'sqlite':
+        # The first number of every index's stat is the table's row count
+        sql = "SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        # No sqlite_stat1 until the database has been analyzed
+        return None
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
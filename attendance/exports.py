@@ -0,0 +1,61 @@
+"""Streaming CSV export of make-up attendance records, live and archived"""
+import csv
+
+from django.utils import timezone
+
+from .models import MakeUpAttendance, ArchivedMakeUpAttendance
+
+EXPORT_HEADER = ['student', 'registration_number', 'subject', 'date', 'marked_at']
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() just returns the line, for csv.writer"""
+    def write(self, value):
+        return value
+
+
+def export_querysets(faculty=None, department=None, subject=None, date_from=None, date_to=None):
+    """
+    Attendance rows as flat tuples, filtered by the class's faculty
+    (username), the faculty's department, subject and class date range.
+    Returns one queryset per store, archived rows first; the two models share
+    field names, so the same filters apply to both.
+    """
+    return tuple(
+        _filtered(model.objects.all(), faculty, department, subject, date_from, date_to)
+        for model in (ArchivedMakeUpAttendance, MakeUpAttendance)
+    )
+
+
+def _filtered(records, faculty, department, subject, date_from, date_to):
+    if faculty:
+        records = records.filter(makeup_class__faculty__username=faculty)
+    if department:
+        records = records.filter(makeup_class__faculty__profile__department__iexact=department)
+    if subject:
+        records = records.filter(makeup_class__subject__iexact=subject)
+    if date_from:
+        records = records.filter(makeup_class__date__gte=date_from)
+    if date_to:
+        records = records.filter(makeup_class__date__lte=date_to)
+    return records.order_by('pk').values_list(
+        'student__first_name', 'student__last_name', 'student__username',
+        'student__profile__registration_number', 'makeup_class__subject',
+        'makeup_class__date', 'marked_at',
+    )
+
+
+def iter_csv(querysets, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield CSV lines for export_querysets' rows without materialising the querysets"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for rows in querysets:
+        for first_name, last_name, username, reg_no, subject, date, marked_at in rows.iterator(chunk_size=chunk_size):
+            yield writer.writerow([
+                f"{first_name} {last_name}".strip() or username,
+                reg_no or '',
+                subject,
+                date.isoformat(),
+                timezone.localtime(marked_at).isoformat(),
+            ])
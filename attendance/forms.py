@@ -5,6 +5,8 @@ from .models import MakeUpClass, UserProfile
 from django.utils import timezone
 from datetime import timedelta
 
+from .scheduling import find_conflicts
+
 
 class RegisterForm(UserCreationForm):
     ROLE_CHOICES = [('student', 'Student'), ('faculty', 'Faculty')]
@@ -39,15 +41,78 @@ class MakeUpClassForm(forms.ModelForm):
             'description': forms.Textarea(attrs={'rows': 3}),
         }
 
+    def __init__(self, *args, faculty=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # A user or a user id; checked for double-booking along with the venue
+        self.faculty = faculty if faculty is not None else self.instance.faculty_id
+
+    def occurrence_dates(self, cleaned_data):
+        """Dates this form books the time slot on"""
+        return [cleaned_data['date']] if cleaned_data.get('date') else []
+
     def clean(self):
         cleaned_data = super().clean()
         start = cleaned_data.get('start_time')
         end = cleaned_data.get('end_time')
         if start and end and start >= end:
             raise forms.ValidationError("End time must be after start time.")
+        dates = self.occurrence_dates(cleaned_data)
+        if dates and start and end:
+            conflicts = find_conflicts(dates, start, end, venue=cleaned_data.get('venue'),
+                                       faculty=self.faculty, exclude_pk=self.instance.pk)
+            if conflicts:
+                raise forms.ValidationError([
+                    forms.ValidationError(
+                        "Clashes with %(subject)s in %(venue)s on %(date)s, %(start)s-%(end)s (%(faculty)s).",
+                        params={
+                            'subject': cls.subject, 'venue': cls.venue, 'date': cls.date.strftime('%d %b %Y'),
+                            'start': cls.start_time.strftime('%H:%M'), 'end': cls.end_time.strftime('%H:%M'),
+                            'faculty': cls.faculty.get_full_name() or cls.faculty.username,
+                        },
+                    )
+                    for cls in conflicts
+                ])
         return cleaned_data
 
 
+class MakeUpClassSeriesForm(MakeUpClassForm):
+    """Schedules a class, optionally repeating weekly on the same weekday"""
+    MAX_OCCURRENCES = 26
+
+    repeat_until = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={'type': 'date'}),
+        help_text="Repeat weekly until this date (inclusive)",
+    )
+
+    def occurrence_dates(self, cleaned_data):
+        first, until = cleaned_data.get('date'), cleaned_data.get('repeat_until')
+        if not first or not until or until <= first:
+            return super().occurrence_dates(cleaned_data)
+        return [first + timedelta(weeks=week) for week in range((until - first).days // 7 + 1)]
+
+    def clean_repeat_until(self):
+        until = self.cleaned_data.get('repeat_until')
+        first = self.cleaned_data.get('date')
+        if until and first:
+            if until < first:
+                raise forms.ValidationError("Repeat-until date must be on or after the class date.")
+            if (until - first).days // 7 + 1 > self.MAX_OCCURRENCES:
+                raise forms.ValidationError(f"A series can have at most {self.MAX_OCCURRENCES} classes.")
+        return until
+
+    def save_series(self, faculty):
+        """Create one class per occurrence date in a single bulk INSERT"""
+        template = self.save(commit=False)
+        classes = []
+        for date in self.occurrence_dates(self.cleaned_data):
+            cls = MakeUpClass(**{field: getattr(template, field) for field in self.Meta.fields})
+            cls.date = date
+            cls.faculty = faculty
+            classes.append(cls)
+        return MakeUpClass.objects.bulk_create(classes)
+
+
 class RemedialCodeForm(forms.Form):
     """Form for faculty to generate a remedial code with expiry"""
     DURATION_CHOICES = [
@@ -78,3 +143,54 @@ class AttendanceMarkForm(forms.Form):
 
     def clean_code(self):
         return self.cleaned_data['code'].strip().upper()
+
+
+class AttendanceExportForm(forms.Form):
+    """Filters for the attendance CSV export; all optional"""
+    faculty = forms.CharField(max_length=150, required=False, help_text="Faculty username")
+    department = forms.CharField(max_length=100, required=False)
+    subject = forms.CharField(max_length=150, required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Start date must be on or before end date.")
+        return cleaned_data
+
+
+class FreeSlotsForm(forms.Form):
+    """Query for free gaps in a venue's schedule"""
+    venue = forms.CharField(max_length=100)
+    date_from = forms.DateField(required=False, help_text="Defaults to today")
+    days = forms.IntegerField(min_value=1, max_value=62, required=False, initial=14)
+    min_minutes = forms.IntegerField(min_value=5, max_value=720, required=False, initial=30)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for name in ('days', 'min_minutes'):
+            if cleaned_data.get(name) is None:
+                cleaned_data[name] = self.fields[name].initial
+        if cleaned_data.get('date_from') is None:
+            cleaned_data['date_from'] = timezone.localdate()
+        return cleaned_data
+
+
+class AnalyticsForm(forms.Form):
+    """Report range and low-attendance threshold; everything optional"""
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    threshold = forms.FloatField(min_value=0, max_value=1, required=False,
+                                 help_text="Flag students whose attendance rate is below this (0-1)")
+    refresh = forms.BooleanField(required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError("Start date must be on or before end date.")
+        return cleaned_data
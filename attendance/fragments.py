@@ -0,0 +1,91 @@
+"""
+Cached HTML fragments for the dashboards and faculty_classes.
+
+Fragment keys embed version stamps: one per faculty (their classes, codes and
+attendance counts) and one per student (their attendance history). The
+receivers in signals.py replace a stamp whenever that data changes, so stale
+fragments are simply never read again and age out of the cache. Stamps are
+random tokens rather than counters, so a stamp evicted from the cache can't
+come back with a value an old fragment was keyed on.
+"""
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FRAGMENT_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_SECONDS', 300)
+
+_lock = threading.Lock()
+_counters = {}
+
+
+def _count(name, result):
+    with _lock:
+        counts = _counters.setdefault(name, {'hits': 0, 'misses': 0})
+        counts[result] += 1
+
+
+def stats():
+    """Hit/miss counters per fragment for this process"""
+    with _lock:
+        counters = {name: dict(counts) for name, counts in _counters.items()}
+    for counts in counters.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_ratio'] = counts['hits'] / total if total else 0.0
+    return counters
+
+
+def _stamp_key(scope, pk):
+    return f'fragment-stamp:{scope}:{pk}'
+
+
+def bump(scope, *pks):
+    """Invalidate every fragment depending on these faculty/student ids"""
+    keys = {_stamp_key(scope, pk): uuid.uuid4().hex for pk in pks if pk is not None}
+    if keys:
+        cache.set_many(keys, None)
+
+
+def stamp(scope, pk):
+    """Current version stamp for a faculty or student id"""
+    return _stamps([(scope, pk)])[0]
+
+
+def _stamps(stamps):
+    keys = [_stamp_key(scope, pk) for scope, pk in stamps]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            # Another process may have won the add
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def render(request, name, template_name, stamps, get_context, vary='', timeout_for=None):
+    """
+    Return template_name rendered with get_context(), from the cache when the
+    stamps haven't moved since it was last rendered.
+
+    stamps is a list of (scope, pk) pairs; vary tells apart variants with the
+    same data, e.g. pages. timeout_for(context) can shorten the cache timeout
+    for fragments that go stale with time, like code expiry.
+    """
+    tokens = ':'.join(f'{scope}{pk}.{token}' for (scope, pk), token in zip(stamps, _stamps(stamps)))
+    key = f'fragment:{name}:{tokens}:{hashlib.md5(vary.encode()).hexdigest()}'
+    html = cache.get(key)
+    if html is not None:
+        _count(name, 'hits')
+        return mark_safe(html)
+
+    _count(name, 'misses')
+    context = get_context()
+    html = render_to_string(template_name, context, request=request)
+    timeout = FRAGMENT_TIMEOUT if timeout_for is None else min(FRAGMENT_TIMEOUT, timeout_for(context))
+    if timeout > 0:
+        cache.set(key, html, timeout)
+    return mark_safe(html)
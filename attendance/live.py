@@ -0,0 +1,115 @@
+"""
+Change notifications for the live class stream.
+
+Anything that changes what the class_detail page shows (a new attendance
+mark, a code generated or deactivated) bumps a per-class version number in
+the cache. Open streams compare versions instead of querying the database,
+and only hit the database when the version moves or the code expires.
+"""
+import asyncio
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import models
+
+VERSION_TIMEOUT = 60 * 60 * 24
+
+POLL_SECONDS = getattr(settings, 'LIVE_STREAM_POLL_SECONDS', 1)
+# Re-read state at least this often, in case a bump was lost (e.g. another
+# worker process with its own locmem cache); also the keepalive interval.
+REFRESH_SECONDS = getattr(settings, 'LIVE_STREAM_REFRESH_SECONDS', 15)
+MAX_SECONDS = getattr(settings, 'LIVE_STREAM_MAX_SECONDS', 300)
+# Under WSGI each open stream holds a worker, so a long-poll gives up early
+LONG_POLL_SECONDS = getattr(settings, 'LIVE_STREAM_LONG_POLL_SECONDS', 25)
+
+
+def _key(makeup_class_id):
+    return f'live:class:{makeup_class_id}'
+
+
+def bump(makeup_class_id):
+    """Signal open streams that the class changed"""
+    key = _key(makeup_class_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, VERSION_TIMEOUT)
+
+
+async def get_state(makeup_class_id):
+    """Current code status and attendance count for a class"""
+    code = await models.RemedialCode.objects.filter(
+        makeup_class_id=makeup_class_id, is_active=True
+    ).order_by('pk').afirst()
+    count = await models.ClassAttendanceSummary.objects.filter(
+        makeup_class_id=makeup_class_id
+    ).values_list('present_count', flat=True).afirst() or 0
+    return {
+        'code': {
+            'pk': code.pk,
+            'is_valid': code.is_valid(),
+            'expires_at': code.expires_at.isoformat(),
+        } if code else None,
+        'attendance_count': count,
+    }
+
+
+def state_id(state):
+    """Short fingerprint of a state, used as the SSE event id"""
+    code = state['code']
+    if code is None:
+        return f"0-0-{state['attendance_count']}"
+    return f"{code['pk']}-{int(code['is_valid'])}-{state['attendance_count']}"
+
+
+def _event(state):
+    return f"id: {state_id(state)}\nretry: 1000\ndata: {json.dumps(state)}\n\n"
+
+
+async def stream(makeup_class_id, last_event_id=None, once=False):
+    """
+    Yield SSE events for a class, only when its state changes.
+
+    The first event is skipped if the client already has it (Last-Event-ID).
+    With once=True the stream ends after the first event, or with a
+    keepalive after LONG_POLL_SECONDS without one, turning it into a
+    long-poll that EventSource reconnects to; this is used under WSGI, where
+    async streams are buffered until they finish.
+    """
+    loop = asyncio.get_running_loop()
+    started = last_refresh = loop.time()
+    version = await cache.aget(_key(makeup_class_id))
+    state = await get_state(makeup_class_id)
+    if state_id(state) != last_event_id:
+        yield _event(state)
+        if once:
+            return
+
+    limit = LONG_POLL_SECONDS if once else MAX_SECONDS
+    while loop.time() - started < limit:
+        await asyncio.sleep(POLL_SECONDS)
+        now = loop.time()
+        new_version = await cache.aget(_key(makeup_class_id))
+        code = state['code']
+        expired = (
+            code is not None and code['is_valid']
+            and timezone.now() >= datetime.fromisoformat(code['expires_at'])
+        )
+        if new_version == version and not expired and now - last_refresh < REFRESH_SECONDS:
+            continue
+
+        version, last_refresh = new_version, now
+        new_state = await get_state(makeup_class_id)
+        if new_state != state:
+            state = new_state
+            yield _event(state)
+            if once:
+                return
+        elif not once:
+            yield ': keepalive\n\n'
+    if once:
+        yield ': keepalive\n\n'
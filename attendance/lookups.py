@@ -0,0 +1,29 @@
+"""
+field__prefix: an index-friendly startswith, used by the admin search.
+
+Django's startswith/istartswith compile to LIKE, which SQLite can only serve
+from an index declared COLLATE NOCASE, and PostgreSQL only from a
+*_pattern_ops one; on the plain B-tree indexes of username and
+registration_number both scan the table. prefix adds the equivalent range
+(col >= 'AB' AND col < 'AC'), which any B-tree index serves, and keeps the
+LIKE to drop the odd collation false positive. Case-sensitive.
+"""
+from django.db.models import CharField, Lookup
+from django.db.models.lookups import StartsWith
+
+
+class Prefix(Lookup):
+    lookup_name = 'prefix'
+
+    def as_sql(self, compiler, connection):
+        like, like_params = StartsWith(self.lhs, self.rhs).as_sql(compiler, connection)
+        if not self.rhs:
+            return like, like_params
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        upper = self.rhs[:-1] + chr(ord(self.rhs[-1]) + 1)
+        return (f'({lhs} >= %s AND {lhs} < %s AND {like})',
+                [*lhs_params, self.rhs, *lhs_params, upper, *like_params])
+
+
+def register():
+    CharField.register_lookup(Prefix)
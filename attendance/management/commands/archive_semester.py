@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from attendance.archive import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, archivable, archive_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Move completed classes dated before a cutoff, with their codes and attendance, into the archive "
+        "tables. Runs in batches of --batch-size classes, one transaction each, so it can be stopped and rerun."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help="Cutoff class date (YYYY-MM-DD); default: ARCHIVE_AFTER_DAYS ago")
+        parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the classes that would move")
+
+    def handle(self, *args, **options):
+        if options['before']:
+            cutoff = parse_date(options['before'])
+            if cutoff is None:
+                raise CommandError("--before must be a date (YYYY-MM-DD)")
+        else:
+            cutoff = timezone.localdate() - timedelta(days=ARCHIVE_AFTER_DAYS)
+
+        if options['dry_run']:
+            self.stdout.write(f"{archivable(cutoff).count()} completed classes dated before {cutoff} would be archived")
+            return
+
+        started = time.perf_counter()
+        moved = [0, 0, 0]
+        for batch in archive_before(cutoff, batch_size=options['batch_size']):
+            moved = [total + count for total, count in zip(moved, batch)]
+            self.stdout.write(f"  {moved[0]} classes, {moved[1]} codes, {moved[2]} attendance records so far")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved[0]} classes, {moved[1]} codes and {moved[2]} attendance records dated before "
+            f"{cutoff} in {time.perf_counter() - started:.1f}s"
+        ))
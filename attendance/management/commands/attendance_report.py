@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from attendance import analytics
+from attendance.forms import AnalyticsForm
+
+
+class Command(BaseCommand):
+    help = (
+        "Print attendance rates per department, subject and faculty, plus students below the threshold. "
+        "Always rebuilds the report, so it also warms the cache the analytics page reads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="First class date (YYYY-MM-DD, default: 30 days ago)")
+        parser.add_argument('--to', dest='date_to', help="Last class date (YYYY-MM-DD, default: today)")
+        parser.add_argument('--threshold', type=float, default=analytics.DEFAULT_THRESHOLD)
+        parser.add_argument('--format', choices=['text', 'json'], default='text')
+
+    def handle(self, *args, **options):
+        form = AnalyticsForm({
+            key: options[key] for key in ('date_from', 'date_to', 'threshold') if options[key] is not None
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        query = form.cleaned_data
+        report = analytics.get_report(query['date_from'], query['date_to'], query['threshold'], refresh=True)
+
+        if options['format'] == 'json':
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(f"Attendance {report['date_from']} to {report['date_to']}")
+        for title, rows, label in (
+            ('Department', report['per_department'], 'department'),
+            ('Subject', report['per_subject'], 'subject'),
+            ('Faculty', report['per_faculty'], 'faculty'),
+        ):
+            self.stdout.write(f"\n{title:<32} {'classes':>8} {'present':>9} {'rate':>7}")
+            for row in rows:
+                rate = f"{row['rate']:.1%}" if row['rate'] is not None else '—'
+                self.stdout.write(f"{str(row[label] or '—')[:32]:<32} {row['classes']:>8} {row['present']:>9} {rate:>7}")
+        below = report['students_below_threshold']
+        self.stdout.write(self.style.WARNING(
+            f"\n{len(below)} students below {report['threshold']:.0%} attendance"
+        ))
@@ -0,0 +1,64 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.models import (
+    CODE_SPACE, MakeUpClass, RemedialCode, encode_code_number, generate_remedial_code,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time remedial code allocation as the number of stored codes grows. "
+        "Runs in a transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='0,100000,1000000,10000000',
+                            help="Comma-separated stored-code counts to measure at")
+        parser.add_argument('--allocations', type=int, default=1000, help="Codes allocated per measurement")
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        with transaction.atomic():
+            faculty = User.objects.create(username='benchmark_code_allocator')
+            today = timezone.localdate()
+            cls = MakeUpClass.objects.create(
+                faculty=faculty, subject='Benchmark', date=today,
+                start_time='09:00', end_time='10:00', venue='Benchmark',
+            )
+            expired = timezone.now() - timedelta(days=365)
+            stored = 0
+
+            self.stdout.write(f"{'stored codes':>14} {'allocate (us)':>14} {'issue (us)':>12}")
+            for size in sizes:
+                while stored < size:
+                    batch = min(options['batch_size'], size - stored)
+                    RemedialCode.objects.bulk_create([
+                        RemedialCode(
+                            makeup_class=cls, created_by=faculty, expires_at=expired, is_active=False,
+                            code=encode_code_number(random.randrange(CODE_SPACE)),
+                        )
+                        for _ in range(batch)
+                    ])
+                    stored += batch
+
+                started = time.perf_counter()
+                for _ in range(options['allocations']):
+                    generate_remedial_code()
+                allocate_us = (time.perf_counter() - started) / options['allocations'] * 1e6
+
+                started = time.perf_counter()
+                for _ in range(options['allocations']):
+                    RemedialCode.issue(makeup_class=cls, created_by=faculty, expires_at=timezone.now())
+                issue_us = (time.perf_counter() - started) / options['allocations'] * 1e6
+                stored += options['allocations']
+
+                self.stdout.write(f"{size:>14,} {allocate_us:>14.0f} {issue_us:>12.0f}")
+            transaction.set_rollback(True)
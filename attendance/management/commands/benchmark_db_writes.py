@@ -0,0 +1,125 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, OperationalError
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from attendance import code_cache
+from attendance.db import DEFAULT_SQLITE_PRAGMAS
+from attendance.management.commands.loadtest_mark_attendance import percentile
+from attendance.models import MakeUpClass, RemedialCode, MakeUpAttendance, UserProfile
+from attendance.services import MarkOutcome, mark_student_attendance
+
+USER_PREFIX = 'dbbench_'
+
+# What the project ran with before attendance.db: rollback journal, fsync on
+# every commit, and the sqlite3 module's default 5 second busy timeout
+BASELINE_SQLITE_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 5000}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent attendance write throughput on SQLite with the old default pragmas "
+        "and with the WAL tuning from attendance.db, while reader threads query the same class"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writes', type=int, default=500, help="Attendance records written per run")
+        parser.add_argument('--writers', type=int, default=8, help="Concurrent writer threads")
+        parser.add_argument('--readers', type=int, default=4, help="Threads running read queries meanwhile")
+        parser.add_argument('--mode', choices=['baseline', 'tuned', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark compares SQLite settings; the default database is "
+                               f"{connection.vendor}.")
+        modes = ['baseline', 'tuned'] if options['mode'] == 'both' else [options['mode']]
+        pragmas = {'baseline': BASELINE_SQLITE_PRAGMAS, 'tuned': DEFAULT_SQLITE_PRAGMAS}
+
+        rows = []
+        try:
+            for mode in modes:
+                with override_settings(SQLITE_PRAGMAS=pragmas[mode]):
+                    # journal_mode is stored in the database file, so start every run from fresh connections
+                    connections.close_all()
+                    rows.append((mode, *self._run(options)))
+                connections.close_all()
+        finally:
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+
+        self.stdout.write(f"{'mode':<10}{'writes/s':>10}{'ok':>7}{'errors':>8}{'p50 ms':>9}{'p99 ms':>9}{'reads':>8}")
+        for mode, rate, ok, errors, p50, p99, reads in rows:
+            self.stdout.write(f"{mode:<10}{rate:>10.1f}{ok:>7}{errors:>8}{p50:>9.1f}{p99:>9.1f}{reads:>8}")
+
+    def _run(self, options):
+        students, code = self._setup(options['writes'])
+        code_cache.put(code)
+        done = threading.Event()
+        reads = []
+
+        def read_loop():
+            count = 0
+            try:
+                while not done.is_set():
+                    MakeUpAttendance.objects.filter(makeup_class_id=code.makeup_class_id).count()
+                    list(MakeUpAttendance.objects.filter(makeup_class_id=code.makeup_class_id)
+                         .order_by('-marked_at')[:50])
+                    count += 1
+            except OperationalError:
+                pass
+            finally:
+                connection.close()
+                reads.append(count)
+
+        def write(student):
+            start = time.perf_counter()
+            try:
+                outcome, _ = mark_student_attendance(student, code.code)
+                ok = outcome is MarkOutcome.MARKED
+            except OperationalError:
+                ok = False
+            finally:
+                connection.close()
+            return time.perf_counter() - start, ok
+
+        readers = [threading.Thread(target=read_loop) for _ in range(options['readers'])]
+        for thread in readers:
+            thread.start()
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['writers']) as pool:
+            results = list(pool.map(write, students))
+        wall = time.perf_counter() - wall_start
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        latencies = sorted(r[0] * 1000 for r in results)
+        ok = sum(1 for _, marked in results if marked)
+        code.deactivate()
+        return (ok / wall, ok, len(results) - ok, percentile(latencies, 50),
+                percentile(latencies, 99), sum(reads))
+
+    def _setup(self, n_students):
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        faculty = User.objects.create_user(f'{USER_PREFIX}faculty', first_name='DB', last_name='Bench')
+        UserProfile.objects.create(user=faculty, role='faculty')
+        students = User.objects.bulk_create([
+            User(username=f'{USER_PREFIX}student_{i}', first_name='Student', last_name=str(i))
+            for i in range(n_students)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=s, role='student', registration_number=f'DB{i:06d}')
+            for i, s in enumerate(students)
+        ])
+        now = timezone.localtime()
+        cls = MakeUpClass.objects.create(
+            faculty=faculty, subject='DB Benchmark', date=now.date(),
+            start_time=now.time(), end_time=now.time(), venue='DB Benchmark', status='active',
+        )
+        code = RemedialCode.issue(cls, faculty, timezone.now() + timedelta(hours=1))
+        return list(User.objects.filter(username__startswith=f'{USER_PREFIX}student_')), code
@@ -0,0 +1,77 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance import ratelimit
+from attendance.middleware import RateLimitMiddleware
+from attendance.models import MakeUpClass, RemedialCode, UserProfile
+
+USER_PREFIX = 'rlbench_'
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request cost of RateLimitMiddleware, alone and through check_code_status"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        n = options['iterations']
+        # High enough that nothing is rejected: this measures the allowed path
+        limits = {'check_code_status': {'user': (10 ** 9, 60), 'ip': (10 ** 9, 60)}}
+
+        start = time.perf_counter()
+        for i in range(n):
+            ratelimit.hit(f'bench:{i % 50}', 10 ** 9, 60)
+        self.stdout.write(f"ratelimit.hit():          {(time.perf_counter() - start) / n * 1e6:8.1f} us")
+
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        faculty = User.objects.create_user(f'{USER_PREFIX}faculty')
+        UserProfile.objects.create(user=faculty, role='faculty')
+        student = User.objects.create_user(f'{USER_PREFIX}student')
+        UserProfile.objects.create(user=student, role='student', registration_number='RL000001')
+        now = timezone.localtime()
+        cls = MakeUpClass.objects.create(faculty=faculty, subject='Rate Limit', date=now.date(),
+                                         start_time=now.time(), end_time=now.time(), venue='Bench')
+        code = RemedialCode.issue(cls, faculty, timezone.now() + timedelta(hours=1))
+        url = reverse('check_code_status', args=[code.pk])
+
+        try:
+            with override_settings(RATE_LIMITS=limits):
+                middleware = RateLimitMiddleware(lambda request: None)
+                client = Client()
+                client.force_login(student)
+                request = RequestFactory().get(url)
+                request.session = client.session
+                start = time.perf_counter()
+                for _ in range(n):
+                    middleware.check(request)
+                self.stdout.write(f"middleware check (2 keys): {(time.perf_counter() - start) / n * 1e6:8.1f} us")
+
+            timings = {}
+            # Interleave the two configurations so drift affects both equally
+            for _ in range(5):
+                for label, rate_limits in (('without limiter', {}), ('with limiter', limits)):
+                    with override_settings(RATE_LIMITS=rate_limits):
+                        client = Client()
+                        client.force_login(student)
+                        for _ in range(n // 5):
+                            start = time.perf_counter()
+                            client.get(url)
+                            timings.setdefault(label, []).append((time.perf_counter() - start) * 1000)
+        finally:
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+
+        medians = {label: statistics.median(values) for label, values in timings.items()}
+        for label, median in medians.items():
+            self.stdout.write(f"check_code_status {label + ':':<17}p50 {median:.3f} ms")
+        overhead = medians['with limiter'] - medians['without limiter']
+        style = self.style.SUCCESS if overhead < 1 else self.style.ERROR
+        self.stdout.write(style(f"Limiter overhead: {overhead:.3f} ms per request (budget 1 ms)"))
@@ -0,0 +1,116 @@
+import json
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import MakeUpClass, RemedialCode, UserProfile
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the main views through the test client on the current (seeded) database and print "
+        "query counts and timings as JSON. Run seed_campus first; mark_attendance writes real rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', '-o', help="Write the JSON here instead of stdout")
+
+    def handle(self, *args, **options):
+        faculty_profile = (UserProfile.objects.filter(role='faculty')
+                           .annotate(n=Count('user__makeup_classes')).order_by('-n').first())
+        student_profile = (UserProfile.objects.filter(role='student')
+                           .annotate(n=Count('user__makeup_attendance')).order_by('-n').first())
+        if faculty_profile is None or student_profile is None:
+            raise CommandError("Need at least one faculty and one student; run seed_campus first.")
+        faculty, student = faculty_profile.user, student_profile.user
+        cls = (MakeUpClass.objects.filter(faculty=faculty)
+               .annotate(n=Count('attendance_records')).order_by('-n').first())
+        if cls is None:
+            raise CommandError(f"{faculty.username} has no classes; run seed_campus first.")
+
+        iterations = options['iterations']
+        code = RemedialCode.issue(cls, faculty, timezone.now() + timedelta(hours=1))
+        # Students who have not attended this class, one per mark_attendance iteration
+        markers = list(UserProfile.objects.filter(role='student')
+                       .exclude(user__makeup_attendance__makeup_class=cls)
+                       .select_related('user')[:iterations])
+
+        faculty_client, student_client = Client(), Client()
+        faculty_client.force_login(faculty)
+        student_client.force_login(student)
+        marker_clients = []
+        for profile in markers:
+            client = Client()
+            client.force_login(profile.user)
+            marker_clients.append(client)
+
+        scenarios = {
+            'dashboard (faculty)': lambda i: faculty_client.get(reverse('dashboard')),
+            'dashboard (student)': lambda i: student_client.get(reverse('dashboard')),
+            'faculty_classes': lambda i: faculty_client.get(reverse('faculty_classes')),
+            'class_detail': lambda i: faculty_client.get(reverse('class_detail', args=[cls.pk])),
+            'my_attendance': lambda i: student_client.get(reverse('my_attendance')),
+            'check_code_status': lambda i: student_client.get(reverse('check_code_status', args=[code.pk])),
+        }
+        if marker_clients:
+            scenarios['mark_attendance'] = lambda i: marker_clients[i % len(marker_clients)].post(
+                reverse('mark_attendance'), {'code': code.code})
+
+        results = {}
+        try:
+            for name, run in scenarios.items():
+                timings, queries, statuses = [], [], set()
+                for i in range(iterations):
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        response = run(i)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    queries.append(len(ctx.captured_queries))
+                    statuses.add(response.status_code)
+                timings.sort()
+                results[name] = {
+                    'queries': max(queries),
+                    'mean_ms': round(statistics.mean(timings), 2),
+                    'p50_ms': round(timings[len(timings) // 2], 2),
+                    'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+                    'min_ms': round(timings[0], 2),
+                    'statuses': sorted(statuses),
+                }
+        finally:
+            code.deactivate()
+
+        report = json.dumps({
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'iterations': iterations,
+            'fixtures': {'faculty': faculty.username, 'student': student.username, 'class': cls.pk},
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.exports import EXPORT_CHUNK_SIZE, export_querysets, iter_csv
+from attendance.forms import AttendanceExportForm
+
+
+class Command(BaseCommand):
+    help = "Stream make-up attendance records as CSV, filtered by faculty, department, subject and date range"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--faculty', help="Faculty username")
+        parser.add_argument('--department')
+        parser.add_argument('--subject')
+        parser.add_argument('--from', dest='date_from', help="First class date (YYYY-MM-DD)")
+        parser.add_argument('--to', dest='date_to', help="Last class date (YYYY-MM-DD)")
+        parser.add_argument('--output', '-o', help="File to write (default: stdout)")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        form = AttendanceExportForm({
+            key: options[key] for key in ('faculty', 'department', 'subject', 'date_from', 'date_to')
+            if options[key]
+        })
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+
+        out = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        rows = 0
+        try:
+            for line in iter_csv(export_querysets(**form.cleaned_data), chunk_size=options['chunk_size']):
+                out.write(line)
+                rows += 1
+        finally:
+            if options['output']:
+                out.close()
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Exported {rows - 1} records to {options['output']}"))
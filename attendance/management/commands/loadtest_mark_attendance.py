@@ -0,0 +1,103 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import MakeUpClass, RemedialCode, MakeUpAttendance, UserProfile
+
+USER_PREFIX = 'loadtest_'
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = "Fire concurrent simulated students at mark_attendance and report latency and errors"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=1,
+                            help="Submissions per student (values above 1 exercise the duplicate path)")
+        parser.add_argument('--keep', action='store_true', help="Keep the generated users and class")
+
+    def handle(self, *args, **options):
+        faculty, code = self._setup(options['students'])
+        students = list(User.objects.filter(username__startswith=f'{USER_PREFIX}student_'))
+        clients = []
+        for student in students:
+            client = Client()
+            client.force_login(student)
+            clients.extend([client] * options['repeat'])
+
+        url = reverse('mark_attendance')
+
+        def submit(client):
+            start = time.perf_counter()
+            try:
+                response = client.post(url, {'code': code.code})
+                status = response.status_code
+            except Exception as exc:  # noqa: BLE001 - every failure counts as an error
+                status = type(exc).__name__
+            finally:
+                connection.close()
+            return time.perf_counter() - start, status
+
+        self.stdout.write(f"Submitting {len(clients)} requests with concurrency {options['concurrency']}...")
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(submit, clients))
+        wall = time.perf_counter() - wall_start
+
+        latencies = sorted(r[0] * 1000 for r in results)
+        statuses = {}
+        for _, status in results:
+            statuses[status] = statuses.get(status, 0) + 1
+        errors = sum(n for status, n in statuses.items() if status != 302)
+        marked = MakeUpAttendance.objects.filter(remedial_code_used=code).count()
+
+        self.stdout.write(f"Requests:   {len(results)} in {wall:.2f}s ({len(results) / wall:.1f} req/s)")
+        self.stdout.write(f"Latency:    p50={percentile(latencies, 50):.1f}ms "
+                          f"p99={percentile(latencies, 99):.1f}ms max={latencies[-1]:.1f}ms")
+        self.stdout.write(f"Statuses:   {statuses}")
+        self.stdout.write(f"Marked:     {marked} of {len(students)} students")
+        if errors:
+            self.stdout.write(self.style.ERROR(f"Errors:     {errors}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Errors:     0"))
+
+        if not options['keep']:
+            User.objects.filter(username__startswith=USER_PREFIX).delete()
+
+    def _setup(self, n_students):
+        User.objects.filter(username__startswith=USER_PREFIX).delete()
+        faculty = User.objects.create_user(f'{USER_PREFIX}faculty', first_name='Load', last_name='Test')
+        UserProfile.objects.create(user=faculty, role='faculty')
+        students = User.objects.bulk_create([
+            User(username=f'{USER_PREFIX}student_{i}', first_name='Student', last_name=str(i))
+            for i in range(n_students)
+        ])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=s, role='student', registration_number=f'LT{i:06d}')
+            for i, s in enumerate(students)
+        ])
+        now = timezone.localtime()
+        cls = MakeUpClass.objects.create(
+            faculty=faculty, subject='Load Test', date=now.date(),
+            start_time=now.time(), end_time=now.time(), venue='Load Test', status='active',
+        )
+        code = RemedialCode.objects.create(
+            makeup_class=cls, created_by=faculty, expires_at=timezone.now() + timedelta(hours=1),
+        )
+        return faculty, code
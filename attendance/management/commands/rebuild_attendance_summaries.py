@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Max
+
+from attendance import db
+from attendance.models import (
+    MakeUpAttendance, ArchivedMakeUpAttendance, StudentAttendanceSummary, ClassAttendanceSummary,
+)
+
+
+def lock_marks():
+    """Hold off new attendance marks until the transaction ends"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            # SHARE conflicts with the ROW EXCLUSIVE lock every INSERT/UPDATE takes
+            cursor.execute(f'LOCK TABLE {connection.ops.quote_name(MakeUpAttendance._meta.db_table)} IN SHARE MODE')
+    else:
+        db.take_write_lock(MakeUpAttendance)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute per-student and per-class attendance summaries from MakeUpAttendance. "
+        "Needed after rows are changed outside mark_attendance (admin edits, bulk loads). "
+        "Student totals include archived attendance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for summary_model, group_field, sources in (
+            (StudentAttendanceSummary, 'student', (MakeUpAttendance, ArchivedMakeUpAttendance)),
+            # Archived classes carry their count on the archive row
+            (ClassAttendanceSummary, 'makeup_class', (MakeUpAttendance,)),
+        ):
+            started = time.perf_counter()
+            with transaction.atomic():
+                # Aggregate and replace under one lock, or marks committed in between would be wiped
+                lock_marks()
+                totals = {}
+                for source in sources:
+                    for row in source.objects.filter(is_present=True).order_by().values(group_field).annotate(
+                        present_count=Count('pk'), last_marked_at=Max('marked_at'),
+                    ).iterator():
+                        total = totals.setdefault(row[group_field], {**row, 'present_count': 0})
+                        total['present_count'] += row['present_count']
+                        total['last_marked_at'] = max(total['last_marked_at'], row['last_marked_at'])
+                summary_model.objects.all().delete()
+                created = summary_model.objects.bulk_create(
+                    [
+                        summary_model(
+                            present_count=row['present_count'],
+                            last_marked_at=row['last_marked_at'],
+                            **{f'{group_field}_id': row[group_field]},
+                        )
+                        for row in totals.values()
+                    ],
+                    batch_size=options['batch_size'],
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt {len(created)} {summary_model._meta.verbose_name_plural} "
+                f"in {time.perf_counter() - started:.1f}s"
+            ))
@@ -0,0 +1,160 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.models import (
+    MakeUpClass, RemedialCode, RemedialCodeSequence, MakeUpAttendance, UserProfile,
+)
+
+DEPARTMENTS = ['CSE', 'ECE', 'ME', 'CE', 'EE', 'Management', 'Law', 'Pharmacy']
+SUBJECTS = [
+    'Data Structures & Algorithms', 'Operating Systems', 'Computer Networks', 'Database Systems',
+    'Digital Electronics', 'Signals & Systems', 'Thermodynamics', 'Engineering Mathematics',
+    'Compiler Design', 'Machine Learning', 'Software Engineering', 'Microprocessors',
+]
+
+
+@contextmanager
+def _explicit_marked_at():
+    """Have bulk_create keep the marked_at set on each record instead of stamping it now (auto_now_add)"""
+    field = MakeUpAttendance._meta.get_field('marked_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic faculty, students, make-up classes, codes and attendance with bulk inserts. "
+        "All generated usernames start with --prefix; --clear removes a previous run first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--faculty', type=int, default=50)
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--classes', type=int, default=1000)
+        parser.add_argument('--attendance-per-class', type=int, default=40)
+        parser.add_argument('--active-codes', type=int, default=10,
+                            help="Number of today's classes given a live code")
+        parser.add_argument('--days', type=int, default=180, help="Spread classes over this many past days")
+        parser.add_argument('--password', default='campus123', help="Password for every generated account")
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--clear', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--random-seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['random_seed'])
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=f'{prefix}_').delete()
+            self.stdout.write(f"Cleared {deleted} rows from a previous run")
+
+        with transaction.atomic():
+            faculty = self._create_users(f'{prefix}_fac', options['faculty'], 'faculty', options, rng)
+            students = self._create_users(f'{prefix}_stu', options['students'], 'student', options, rng)
+            classes = self._create_classes(faculty, options, rng)
+            codes = self._create_codes(classes, options)
+            attended = self._create_attendance(classes, codes, students, options, rng)
+
+        call_command('rebuild_attendance_summaries', batch_size=batch_size, stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(faculty)} faculty, {len(students)} students, {len(classes)} classes, "
+            f"{len(codes)} codes and {attended} attendance records in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def _create_users(self, username_prefix, count, role, options, rng):
+        password = make_password(options['password'])
+        User.objects.bulk_create([
+            User(username=f'{username_prefix}{i}', first_name=role.title(), last_name=str(i), password=password)
+            for i in range(count)
+        ], batch_size=options['batch_size'])
+        users = list(User.objects.filter(username__startswith=username_prefix).order_by('pk'))
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                role=role,
+                registration_number=f"{options['prefix'].upper()[:4]}{i:08d}" if role == 'student' else None,
+                department=rng.choice(DEPARTMENTS),
+            )
+            for i, user in enumerate(users)
+        ], batch_size=options['batch_size'])
+        return users
+
+    def _create_classes(self, faculty, options, rng):
+        today = timezone.localdate()
+        classes = []
+        for i in range(options['classes']):
+            # The newest classes are today's, so some can carry live codes
+            day = today if i < options['active_codes'] else today - timedelta(days=rng.randint(0, options['days']))
+            hour = rng.randint(8, 17)
+            classes.append(MakeUpClass(
+                faculty=rng.choice(faculty),
+                subject=rng.choice(SUBJECTS),
+                topic=f"Revision {i}",
+                date=day,
+                start_time=dt_time(hour),
+                end_time=dt_time(hour + 1),
+                venue=f"Block {rng.randint(1, 40)}, Room {rng.randint(100, 499)}",
+                status='completed' if day < today else 'active',
+            ))
+        MakeUpClass.objects.bulk_create(classes, batch_size=options['batch_size'])
+        if classes[0].pk is None:
+            # Backends that can't return ids from bulk inserts
+            faculty_ids = [user.pk for user in faculty]
+            classes = list(MakeUpClass.objects.filter(faculty_id__in=faculty_ids).order_by('pk'))
+        return classes
+
+    def _create_codes(self, classes, options):
+        now = timezone.now()
+        code_strings = RemedialCodeSequence.allocate_codes(len(classes))
+        codes = [
+            RemedialCode(
+                makeup_class=cls,
+                created_by_id=cls.faculty_id,
+                code=code,
+                expires_at=now + timedelta(hours=1) if i < options['active_codes'] else now - timedelta(days=1),
+                is_active=i < options['active_codes'],
+            )
+            for i, (cls, code) in enumerate(zip(classes, code_strings))
+        ]
+        RemedialCode.objects.bulk_create(codes, batch_size=options['batch_size'])
+        if codes and codes[0].pk is None:
+            by_code = dict(RemedialCode.objects.filter(code__in=code_strings).values_list('code', 'pk'))
+            for code in codes:
+                code.pk = by_code[code.code]
+        return codes
+
+    def _create_attendance(self, classes, codes, students, options, rng):
+        per_class = min(options['attendance_per_class'], len(students))
+        tz = timezone.get_current_timezone()
+        batch, total = [], 0
+        # Records are marked at their class's start time
+        with _explicit_marked_at():
+            for cls, code in zip(classes, codes):
+                marked_at = timezone.make_aware(datetime.combine(cls.date, cls.start_time), tz)
+                for student in rng.sample(students, per_class):
+                    batch.append(MakeUpAttendance(
+                        student=student, makeup_class=cls, remedial_code_used_id=code.pk,
+                        marked_at=marked_at, is_present=True,
+                    ))
+                if len(batch) >= options['batch_size']:
+                    MakeUpAttendance.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            MakeUpAttendance.objects.bulk_create(batch)
+        total += len(batch)
+        return total
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from attendance.sweeper import SWEEP_BATCH_SIZE, sweep
+
+
+class Command(BaseCommand):
+    help = "Deactivate expired remedial codes and advance class statuses; --loop keeps sweeping"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep sweeping until interrupted")
+        parser.add_argument('--interval', type=float, default=60, help="Seconds between sweeps with --loop")
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            touched = sweep(batch_size=options['batch_size'])
+            self.stdout.write(
+                f"Sweep: {touched['codes_deactivated']} codes deactivated, "
+                f"{touched['classes_started']} classes started, "
+                f"{touched['classes_completed']} classes completed "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+            if not options['loop']:
+                return
+            close_old_connections()
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
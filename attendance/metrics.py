@@ -0,0 +1,94 @@
+"""
+In-process request metrics, exported in Prometheus text format at /metrics.
+
+Histograms are per process (and reset on restart); scrape every worker, or
+aggregate in Prometheus.
+"""
+import threading
+from bisect import bisect_left
+
+from . import code_cache, fragments
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 10_000_000)
+
+HISTOGRAMS = {
+    'attendance_request_duration_seconds': ("Total time spent handling the request", DURATION_BUCKETS),
+    'attendance_sql_queries': ("SQL queries executed per request", QUERY_BUCKETS),
+    'attendance_sql_duration_seconds': ("Time spent in SQL per request", DURATION_BUCKETS),
+    'attendance_render_duration_seconds': ("Time spent rendering templates per request", DURATION_BUCKETS),
+    'attendance_response_size_bytes': ("Response body size (non-streaming responses)", SIZE_BUCKETS),
+}
+
+_lock = threading.Lock()
+# {(metric, view): [bucket counts..., +Inf count], sum}
+_histograms = {}
+_over_budget = {}
+_rate_limited = {}
+
+
+def observe(metric, view, value):
+    buckets = HISTOGRAMS[metric][1]
+    with _lock:
+        counts, total = _histograms.get((metric, view)) or ([0] * (len(buckets) + 1), 0)
+        counts[bisect_left(buckets, value)] += 1
+        _histograms[(metric, view)] = (counts, total + value)
+
+
+def count_over_budget(view):
+    with _lock:
+        _over_budget[view] = _over_budget.get(view, 0) + 1
+
+
+def count_rate_limited(view, scope):
+    with _lock:
+        _rate_limited[(view, scope)] = _rate_limited.get((view, scope), 0) + 1
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        histograms = {key: (list(counts), total) for key, (counts, total) in _histograms.items()}
+        over_budget = dict(_over_budget)
+        rate_limited = dict(_rate_limited)
+
+    lines = []
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} histogram']
+        for (name, view), (counts, total) in sorted(histograms.items()):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{view="{_label(view)}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_sum{{view="{_label(view)}"}} {total}')
+            lines.append(f'{metric}_count{{view="{_label(view)}"}} {cumulative}')
+
+    lines += ['# HELP attendance_query_budget_exceeded_total Requests that ran more queries than QUERY_BUDGET',
+              '# TYPE attendance_query_budget_exceeded_total counter']
+    for view, count in sorted(over_budget.items()):
+        lines.append(f'attendance_query_budget_exceeded_total{{view="{_label(view)}"}} {count}')
+
+    lines += ['# HELP attendance_rate_limited_total Requests rejected by RATE_LIMITS',
+              '# TYPE attendance_rate_limited_total counter']
+    for (view, scope), count in sorted(rate_limited.items()):
+        lines.append(f'attendance_rate_limited_total{{view="{_label(view)}",scope="{scope}"}} {count}')
+
+    cache_stats = code_cache.stats()
+    lines += ['# HELP attendance_code_cache_requests_total Remedial code cache lookups',
+              '# TYPE attendance_code_cache_requests_total counter',
+              f'attendance_code_cache_requests_total{{result="hit"}} {cache_stats["hits"]}',
+              f'attendance_code_cache_requests_total{{result="miss"}} {cache_stats["misses"]}']
+
+    lines += ['# HELP attendance_fragment_cache_requests_total Rendered fragment cache lookups',
+              '# TYPE attendance_fragment_cache_requests_total counter']
+    for name, counts in sorted(fragments.stats().items()):
+        lines += [f'attendance_fragment_cache_requests_total{{fragment="{_label(name)}",result="hit"}} {counts["hits"]}',
+                  f'attendance_fragment_cache_requests_total{{fragment="{_label(name)}",result="miss"}} {counts["misses"]}']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,162 @@
+import contextvars
+import functools
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.db import connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.template.backends.django import Template
+
+from . import metrics, ratelimit
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('attendance_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def _install_render_timer():
+    """Time the top-level render of every Django template (includes nested ones)"""
+    if getattr(Template.render, 'timed', False):
+        return
+    original = Template.render
+
+    @functools.wraps(original)
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            stats.render_time += time.perf_counter() - start
+
+    render.timed = True
+    Template.render = render
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, SQL time, render time, total time and response size
+    for every attendance view, and warns when a request exceeds QUERY_BUDGET.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'QUERY_BUDGET', 50)
+        _install_render_timer()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.func.__module__.startswith('attendance.'):
+            return response
+        view = match.url_name or match.func.__name__
+
+        metrics.observe('attendance_request_duration_seconds', view, duration)
+        metrics.observe('attendance_sql_queries', view, stats.queries)
+        metrics.observe('attendance_sql_duration_seconds', view, stats.sql_time)
+        metrics.observe('attendance_render_duration_seconds', view, stats.render_time)
+        if not response.streaming:
+            metrics.observe('attendance_response_size_bytes', view, len(response.content))
+
+        if stats.queries > self.query_budget:
+            metrics.count_over_budget(view)
+            logger.warning(
+                "%s %s ran %d queries (budget %d, %.1f ms in SQL)",
+                request.method, request.path, stats.queries, self.query_budget, stats.sql_time * 1000,
+            )
+        return response
+
+
+class ProfileMiddleware:
+    """
+    Attaches request.profile (None for anonymous users and users without one)
+    and request.role. Goes after AuthenticationMiddleware; with ProfileBackend
+    the profile arrives with the user, so this costs no extra query.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        user = request.user
+        request.profile = getattr(user, 'profile', None) if user.is_authenticated else None
+        request.role = request.profile.role if request.profile else None
+        return self.get_response(request)
+
+
+class RateLimitMiddleware:
+    """
+    Applies RATE_LIMITS per logged-in user, and per client IP to requests
+    without one. Goes after SessionMiddleware and before
+    AuthenticationMiddleware: the user id is read from the session, so
+    rejected requests never reach the ORM.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limits = getattr(settings, 'RATE_LIMITS', {})
+
+    def __call__(self, request):
+        if self.limits:
+            rejected = self.check(request)
+            if rejected is not None:
+                return rejected
+        return self.get_response(request)
+
+    def check(self, request):
+        try:
+            name = resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+        rules = self.limits.get(name)
+        if not rules or ('methods' in rules and request.method not in rules['methods']):
+            return None
+
+        # A whole hall of students can share one NAT address, so logged-in
+        # requests are only ever limited per user
+        user_id = request.session.get(SESSION_KEY)
+        scope, ident = ('user', user_id) if user_id is not None else ('ip', request.META.get('REMOTE_ADDR', ''))
+        if scope not in rules:
+            return None
+        limit, window = rules[scope]
+        allowed, retry_after = ratelimit.hit(f'{name}:{scope}:{ident}', limit, window)
+        if allowed:
+            return None
+        metrics.count_rate_limited(name, scope)
+        logger.warning("Rate limited %s %s (%s %s)", request.method, request.path, scope, ident)
+        response = HttpResponse("Too many requests, please slow down.", status=429, content_type='text/plain')
+        response['Retry-After'] = str(retry_after)
+        return response
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='makeupattendance',
+            index=models.Index(fields=['student', 'marked_at'], name='attendance_student_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='makeupattendance',
+            index=models.Index(fields=['makeup_class', 'marked_at'], name='attendance_class_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='makeupclass',
+            index=models.Index(fields=['faculty', '-date', '-start_time'], name='makeupclass_faculty_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remedialcode',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['makeup_class'], name='remcode_class_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remedialcode',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['created_by'], name='remcode_creator_active_idx'),
+        ),
+    ]
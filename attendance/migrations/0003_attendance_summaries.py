@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_summaries(apps, schema_editor):
+    MakeUpAttendance = apps.get_model('attendance', 'MakeUpAttendance')
+    for model_name, group_field in (
+        ('StudentAttendanceSummary', 'student'),
+        ('ClassAttendanceSummary', 'makeup_class'),
+    ):
+        summary_model = apps.get_model('attendance', model_name)
+        totals = MakeUpAttendance.objects.filter(is_present=True).order_by().values(group_field).annotate(
+            present_count=models.Count('pk'), last_marked_at=models.Max('marked_at'),
+        )
+        summary_model.objects.bulk_create([
+            summary_model(
+                present_count=row['present_count'],
+                last_marked_at=row['last_marked_at'],
+                **{f'{group_field}_id': row[group_field]},
+            )
+            for row in totals
+        ], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0002_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('last_marked_at', models.DateTimeField(blank=True, null=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summary', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'student attendance summaries',
+            },
+        ),
+        migrations.CreateModel(
+            name='ClassAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('last_marked_at', models.DateTimeField(blank=True, null=True)),
+                ('makeup_class', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summary', to='attendance.makeupclass')),
+            ],
+            options={
+                'verbose_name_plural': 'class attendance summaries',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
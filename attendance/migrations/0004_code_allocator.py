@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:26
+
+import attendance.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemedialCodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('next_value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='remedialcode',
+            name='code',
+            field=models.CharField(db_index=True, default=attendance.models.generate_remedial_code, max_length=10),
+        ),
+        migrations.AddConstraint(
+            model_name='remedialcode',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('code',), name='unique_active_remedial_code'),
+        ),
+    ]
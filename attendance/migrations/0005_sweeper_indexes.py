@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_code_allocator'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='makeupclass',
+            index=models.Index(fields=['status', 'date'], name='makeupclass_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='remedialcode',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['expires_at'], name='remcode_expiry_active_idx'),
+        ),
+    ]
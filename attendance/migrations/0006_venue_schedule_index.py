@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_sweeper_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='makeupclass',
+            index=models.Index(fields=['venue', 'date', 'start_time'], name='makeupclass_venue_date_idx'),
+        ),
+    ]
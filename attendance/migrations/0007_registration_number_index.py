@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_venue_schedule_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userprofile',
+            name='registration_number',
+            field=models.CharField(blank=True, db_index=True, max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('attendance', '0007_registration_number_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMakeUpClass',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('subject', models.CharField(max_length=150)),
+                ('topic', models.CharField(blank=True, max_length=200)),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('venue', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('upcoming', 'Upcoming'), ('active', 'Active'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=10)),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('present_count', models.PositiveIntegerField(default=0)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('faculty', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_makeup_classes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedRemedialCode',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('code', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField()),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('makeup_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='remedial_codes', to='attendance.archivedmakeupclass')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedMakeUpAttendance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('marked_at', models.DateTimeField()),
+                ('is_present', models.BooleanField(default=True)),
+                ('makeup_class', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='attendance.archivedmakeupclass')),
+                ('remedial_code_used', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='attendance.archivedremedialcode')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedmakeupclass',
+            index=models.Index(fields=['faculty', 'date'], name='archclass_faculty_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmakeupattendance',
+            index=models.Index(fields=['student', 'marked_at'], name='archattendance_student_idx'),
+        ),
+    ]
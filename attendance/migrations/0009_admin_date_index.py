@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='makeupattendance',
+            index=models.Index(fields=['marked_at'], name='attendance_marked_at_idx'),
+        ),
+    ]
@@ -1,9 +1,14 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import User
-import random
+import hashlib
+import hmac
+import secrets
 import string
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 
+from . import code_cache, fragments, live
+
 
 class UserProfile(models.Model):
     """Extends User with role (faculty or student)"""
@@ -13,7 +18,7 @@ class UserProfile(models.Model):
     ]
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
-    registration_number = models.CharField(max_length=20, blank=True, null=True)  # For students
+    registration_number = models.CharField(max_length=20, blank=True, null=True, db_index=True)  # For students
     department = models.CharField(max_length=100, blank=True)
 
     def __str__(self):
@@ -26,6 +31,20 @@ class UserProfile(models.Model):
         return self.role == 'student'
 
 
+class MakeUpClassQuerySet(models.QuerySet):
+    def with_listing_stats(self):
+        """Annotate present count (from the summary table) and prefetch active codes for list pages"""
+        return self.annotate(
+            present_count=Coalesce('attendance_summary__present_count', 0),
+        ).prefetch_related(
+            models.Prefetch(
+                'remedial_codes',
+                queryset=RemedialCode.objects.filter(is_active=True).order_by('pk'),
+                to_attr='active_codes',
+            )
+        )
+
+
 class MakeUpClass(models.Model):
     """A make-up/remedial class scheduled by faculty"""
     STATUS_CHOICES = [
@@ -46,37 +65,157 @@ class MakeUpClass(models.Model):
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = MakeUpClassQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date', '-start_time']
+        indexes = [
+            models.Index(fields=['faculty', '-date', '-start_time'], name='makeupclass_faculty_date_idx'),
+            # Sweeper: open (upcoming/active) classes by date
+            models.Index(fields=['status', 'date'], name='makeupclass_status_date_idx'),
+            # Venue double-booking checks and free-slot search
+            models.Index(fields=['venue', 'date', 'start_time'], name='makeupclass_venue_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subject} - {self.date} ({self.faculty.get_full_name()})"
 
     def get_active_code(self):
         """Returns the currently active remedial code for this class"""
+        if hasattr(self, 'active_codes'):
+            return self.active_codes[0] if self.active_codes else None
         return self.remedial_codes.filter(is_active=True).first()
 
+    def deactivate_codes(self):
+        """Deactivate every active code for this class and drop them from the code cache"""
+        active = list(self.remedial_codes.filter(is_active=True).values_list('pk', 'code'))
+        if active:
+            self.remedial_codes.filter(pk__in=[pk for pk, _ in active]).update(is_active=False)
+            code_cache.invalidate_many(active)
+            live.bump(self.pk)
+            # A bulk update sends no post_save, so the fragment receivers don't see it
+            fragments.bump('faculty', self.faculty_id)
+
     def total_attendance(self):
+        if hasattr(self, 'present_count'):
+            return self.present_count
         return MakeUpAttendance.objects.filter(makeup_class=self, is_present=True).count()
 
 
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 6
+CODE_SPACE = len(CODE_ALPHABET) ** CODE_LENGTH
+
+
+def _feistel32(value, key):
+    """Keyed bijection on 32-bit integers (4-round Feistel network)"""
+    left, right = value >> 16, value & 0xFFFF
+    for round_no in range(4):
+        digest = hmac.new(key, bytes([round_no]) + right.to_bytes(2, 'big'), hashlib.sha256).digest()
+        left, right = right, left ^ int.from_bytes(digest[:2], 'big')
+    return (left << 16) | right
+
+
+def permute_code_number(n, key):
+    """Map 0..CODE_SPACE-1 onto itself in a key-dependent order (cycle walking)"""
+    value = n
+    while True:
+        value = _feistel32(value, key)
+        if value < CODE_SPACE:
+            return value
+
+
+def encode_code_number(n):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        n, digit = divmod(n, len(CODE_ALPHABET))
+        chars.append(CODE_ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+class RemedialCodeSequence(models.Model):
+    """
+    Single-row counter behind generate_remedial_code(). Each counter value
+    is pushed through a keyed permutation of the 36^6 code space, so codes
+    look random but cannot repeat until the whole space has been issued.
+    """
+    key = models.CharField(max_length=64)
+    next_value = models.BigIntegerField(default=0)
+
+    @classmethod
+    def allocate(cls, count=1):
+        """Reserve count consecutive counter values; returns (first value, key bytes)"""
+        with transaction.atomic():
+            # Write first, so SQLite takes the write lock before reading
+            if not cls.objects.filter(pk=1).update(next_value=models.F('next_value') + count):
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(pk=1, key=secrets.token_hex(32), next_value=count)
+                except IntegrityError:
+                    cls.objects.filter(pk=1).update(next_value=models.F('next_value') + count)
+            seq = cls.objects.get(pk=1)
+        return seq.next_value - count, bytes.fromhex(seq.key)
+
+    @classmethod
+    def allocate_codes(cls, count):
+        """Reserve a block of codes at once, e.g. for bulk inserts"""
+        first, key = cls.allocate(count)
+        return [encode_code_number(permute_code_number((first + i) % CODE_SPACE, key)) for i in range(count)]
+
+
 def generate_remedial_code():
-    """Generate a unique 6-character alphanumeric code"""
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    """Allocate the next 6-character alphanumeric code; unique among live codes"""
+    return RemedialCodeSequence.allocate_codes(1)[0]
 
 
 class RemedialCode(models.Model):
     """Unique code generated per make-up class session"""
     makeup_class = models.ForeignKey(MakeUpClass, on_delete=models.CASCADE, related_name='remedial_codes')
-    code = models.CharField(max_length=10, unique=True, default=generate_remedial_code)
+    code = models.CharField(max_length=10, db_index=True, default=generate_remedial_code)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        # Codes only need to be unique while live; expired codes may be reissued
+        constraints = [
+            models.UniqueConstraint(fields=['code'], condition=models.Q(is_active=True),
+                                    name='unique_active_remedial_code'),
+        ]
+        # Partial indexes: only the few active codes are ever looked up this way
+        indexes = [
+            models.Index(fields=['makeup_class'], condition=models.Q(is_active=True),
+                         name='remcode_class_active_idx'),
+            models.Index(fields=['created_by'], condition=models.Q(is_active=True),
+                         name='remcode_creator_active_idx'),
+            models.Index(fields=['expires_at'], condition=models.Q(is_active=True),
+                         name='remcode_expiry_active_idx'),
+        ]
+
     def __str__(self):
         return f"Code: {self.code} | {self.makeup_class.subject}"
 
+    @classmethod
+    def issue(cls, makeup_class, created_by, expires_at, attempts=5):
+        """
+        Create an active code. The allocator never repeats a code until the
+        space wraps, but codes issued before it existed were random, so a
+        clash with one of those that is still active just takes the next code.
+        """
+        for attempt in range(attempts):
+            # Allocate outside the savepoint, or a rollback would rewind the counter
+            code = generate_remedial_code()
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(
+                        makeup_class=makeup_class, created_by=created_by, expires_at=expires_at,
+                        code=code, is_active=True,
+                    )
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+
     def is_expired(self):
         return timezone.now() > self.expires_at
 
@@ -86,6 +225,8 @@ class RemedialCode(models.Model):
     def deactivate(self):
         self.is_active = False
         self.save()
+        code_cache.invalidate(self.pk, self.code)
+        live.bump(self.makeup_class_id)
 
 
 class MakeUpAttendance(models.Model):
@@ -99,7 +240,158 @@ class MakeUpAttendance(models.Model):
     class Meta:
         unique_together = ('student', 'makeup_class')
         ordering = ['-marked_at']
+        # Ascending on marked_at so one index serves both newest-first listings
+        # (scanned backwards, with id as the implicit tie-break) and the
+        # oldest-first cursor queries. is_present is left out: nearly every
+        # row is present, and SQLite can't seek on a bare boolean predicate.
+        indexes = [
+            models.Index(fields=['student', 'marked_at'], name='attendance_student_recent_idx'),
+            models.Index(fields=['makeup_class', 'marked_at'], name='attendance_class_recent_idx'),
+            # Admin date_hierarchy: MIN/MAX(marked_at) and the year/month drill-down
+            models.Index(fields=['marked_at'], name='attendance_marked_at_idx'),
+        ]
 
     def __str__(self):
         status = "Present" if self.is_present else "Absent"
         return f"{self.student.get_full_name()} - {self.makeup_class.subject} - {status}"
+
+
+class AttendanceSummary(models.Model):
+    """Denormalised present count, kept in step with MakeUpAttendance writes"""
+    present_count = models.PositiveIntegerField(default=0)
+    last_marked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def record_marks(cls, marked_at, count=1, **lookup):
+        """Add present marks; call inside the transaction that created them"""
+        changes = {'present_count': models.F('present_count') + count, 'last_marked_at': marked_at}
+        if cls.objects.filter(**lookup).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(present_count=count, last_marked_at=marked_at, **lookup)
+        except IntegrityError:
+            # Another transaction created the row first
+            cls.objects.filter(**lookup).update(**changes)
+
+    @classmethod
+    def record_marks_each(cls, marked_at, field, values):
+        """
+        One present mark for each of many rows, e.g. every student in a batch
+        check-in: one UPDATE for the existing rows, one INSERT for the rest.
+        Call inside the transaction that created the marks.
+        """
+        values = set(values)
+        existing = set(cls.objects.filter(**{f'{field}__in': values}).values_list(field, flat=True))
+        cls.objects.filter(**{f'{field}__in': existing}).update(
+            present_count=models.F('present_count') + 1, last_marked_at=marked_at,
+        )
+        missing = values - existing
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create([
+                    cls(present_count=1, last_marked_at=marked_at, **{field: value}) for value in missing
+                ])
+        except IntegrityError:
+            # Some were created concurrently; fall back to one at a time
+            for value in missing:
+                cls.record_marks(marked_at, **{field: value})
+
+    @classmethod
+    def remove_marks(cls, count=1, **lookup):
+        """Take back present marks whose rows are being deleted; call inside the deleting transaction"""
+        cls.objects.filter(**lookup).update(present_count=Greatest(models.F('present_count') - count, 0))
+
+    @classmethod
+    def present_count_for(cls, **lookup):
+        return cls.objects.filter(**lookup).values_list('present_count', flat=True).first() or 0
+
+
+class StudentAttendanceSummary(AttendanceSummary):
+    """Per-student totals for the dashboard and attendance history"""
+    student = models.OneToOneField(User, on_delete=models.CASCADE, related_name='attendance_summary')
+
+    class Meta:
+        verbose_name_plural = 'student attendance summaries'
+
+    def __str__(self):
+        return f"{self.student.username}: {self.present_count} present"
+
+
+class ClassAttendanceSummary(AttendanceSummary):
+    """Per-class totals for faculty listings and the live counter"""
+    makeup_class = models.OneToOneField(MakeUpClass, on_delete=models.CASCADE, related_name='attendance_summary')
+
+    class Meta:
+        verbose_name_plural = 'class attendance summaries'
+
+    def __str__(self):
+        return f"{self.makeup_class.subject}: {self.present_count} present"
+
+
+# Archive tables: old completed classes with their codes and attendance,
+# moved out of the live tables by archive.py
+
+class ArchivedMakeUpClass(models.Model):
+    """A completed class moved out of MakeUpClass by archive_semester; keeps its original id"""
+    id = models.BigIntegerField(primary_key=True)
+    faculty = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_makeup_classes')
+    subject = models.CharField(max_length=150)
+    topic = models.CharField(max_length=200, blank=True)
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    venue = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=MakeUpClass.STATUS_CHOICES)
+    description = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    # ClassAttendanceSummary.present_count at archive time
+    present_count = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['faculty', 'date'], name='archclass_faculty_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} - {self.date} (archived)"
+
+
+class ArchivedRemedialCode(models.Model):
+    """An expired code of an archived class"""
+    id = models.BigIntegerField(primary_key=True)
+    makeup_class = models.ForeignKey(ArchivedMakeUpClass, on_delete=models.CASCADE, related_name='remedial_codes')
+    code = models.CharField(max_length=10)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Code: {self.code} (archived)"
+
+
+class ArchivedMakeUpAttendance(models.Model):
+    """
+    MakeUpAttendance row of an archived class. Same field names as the live
+    model, so history views can run one query shape against both tables.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_attendance')
+    makeup_class = models.ForeignKey(ArchivedMakeUpClass, on_delete=models.CASCADE,
+                                     related_name='attendance_records')
+    remedial_code_used = models.ForeignKey(ArchivedRemedialCode, on_delete=models.SET_NULL, null=True, blank=True)
+    marked_at = models.DateTimeField()
+    is_present = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'marked_at'], name='archattendance_student_idx'),
+        ]
+
+    def __str__(self):
+        status = "Present" if self.is_present else "Absent"
+        return f"{self.student.username} - {self.makeup_class.subject} - {status} (archived)"
@@ -0,0 +1,128 @@
+"""
+Keyset (seek) pagination for newest-first listings.
+
+Pages are addressed by the (key, pk) of the row at their edge rather than an
+offset, so every page is an index range scan no matter how deep it is. The
+key is one field or a tuple of fields (e.g. ('date', 'start_time')).
+Works on model instances and on values() rows that include 'pk'.
+
+EstimatedCountPaginator is for the admin changelists of the big tables.
+"""
+import base64
+import binascii
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .db import estimate_row_count
+
+PAGE_SIZE = getattr(settings, 'LISTING_PAGE_SIZE', 25)
+# Below this many rows an exact COUNT(*) is cheap enough
+ESTIMATE_COUNT_ABOVE = 100_000
+
+
+class KeysetPage:
+    def __init__(self, items, key, has_next, has_previous):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = encode_cursor(items[-1], key) if has_next and items else ''
+        self.previous_cursor = encode_cursor(items[0], key) if has_previous and items else ''
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _field(obj, name):
+    return obj[name] if isinstance(obj, dict) else getattr(obj, name)
+
+
+def _fields(key):
+    return (key,) if isinstance(key, str) else tuple(key)
+
+
+def encode_cursor(obj, key):
+    raw = '|'.join([*(_field(obj, name).isoformat() for name in _fields(key)), str(_field(obj, 'pk'))])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse):
+    """Return (key values, pk) from a cursor, or None if it is malformed"""
+    parsers = (parse,) if callable(parse) else tuple(parse)
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        *values, pk = raw.split('|')
+        if len(values) != len(parsers):
+            return None
+        values = tuple(parser(value) for parser, value in zip(parsers, values))
+        return (values, int(pk)) if None not in values else None
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _past(names, values, pk, op):
+    """Rows after (values, pk) in lexicographic (names..., pk) order"""
+    condition = Q(**{f'pk__{op}': pk})
+    for name, value in reversed(list(zip(names, values))):
+        condition = Q(**{f'{name}__{op}': value}) | Q(**{name: value}) & condition
+    return condition
+
+
+def _seek(querysets, key, cursor, ascending, limit):
+    """The first limit rows past cursor in (key, pk) order, merged across querysets"""
+    names = _fields(key)
+    op, order = ('gt', (*names, 'pk')) if ascending else ('lt', (*(f'-{name}' for name in names), '-pk'))
+    rows = []
+    for queryset in querysets:
+        if cursor is not None:
+            queryset = queryset.filter(_past(names, *cursor, op))
+        rows += queryset.order_by(*order)[:limit]
+    if len(querysets) > 1:
+        rows.sort(key=lambda obj: (*(_field(obj, name) for name in names), _field(obj, 'pk')),
+                  reverse=not ascending)
+    return rows[:limit]
+
+
+def keyset_paginate(queryset, key, params, parse, page_size=PAGE_SIZE):
+    """
+    Page through queryset ordered by (-key, -pk).
+
+    params is request.GET: 'after' moves to older rows, 'before' to newer
+    ones; parse turns the key's isoformat() back into a value (one parser
+    per field for a tuple key). queryset may also be a tuple of querysets
+    with disjoint pks (e.g. live and archived rows), paged as one listing at
+    one query per queryset.
+    """
+    querysets = queryset if isinstance(queryset, (list, tuple)) else (queryset,)
+    after = decode_cursor(params.get('after', ''), parse)
+    before = decode_cursor(params.get('before', ''), parse) if after is None else None
+
+    if before is not None:
+        rows = _seek(querysets, key, before, ascending=True, limit=page_size + 1)
+        has_previous = len(rows) > page_size
+        return KeysetPage(rows[:page_size][::-1], key, has_next=True, has_previous=has_previous)
+
+    rows = _seek(querysets, key, after, ascending=False, limit=page_size + 1)
+    return KeysetPage(rows[:page_size], key, has_next=len(rows) > page_size, has_previous=after is not None)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Offset paginator whose count for an unfiltered queryset is the database's
+    row estimate rather than COUNT(*), which visits every row. Filtered
+    querysets and small tables are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATE_COUNT_ABOVE:
+                return estimate
+        return super().count
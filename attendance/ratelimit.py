@@ -0,0 +1,42 @@
+"""
+Sliding-window rate limits on top of Django's cache.
+
+Each key keeps a counter per fixed window; a request is allowed while
+
+    previous window's count * (share of it still inside the sliding window)
+    + current window's count <= limit
+
+which approximates a true sliding log with two cache entries and one atomic
+increment. Rejected requests still count, so a client that keeps hammering
+stays locked out until it slows down.
+"""
+import math
+import time
+
+from django.core.cache import cache
+
+KEY_PREFIX = 'ratelimit'
+
+
+def _increment(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        # Created by a concurrent request in between
+        return cache.incr(key)
+
+
+def hit(key, limit, window, now=None):
+    """
+    Count one request against key. Returns (allowed, retry_after seconds)
+    for a budget of limit requests per window seconds.
+    """
+    now = time.time() if now is None else now
+    current, offset = divmod(now, window)
+    current = int(current)
+    count = _increment(f'{KEY_PREFIX}:{key}:{window}:{current}', window * 2)
+    previous = cache.get(f'{KEY_PREFIX}:{key}:{window}:{current - 1}', 0)
+    estimate = previous * (1 - offset / window) + count
+    return estimate <= limit, math.ceil(window - offset)
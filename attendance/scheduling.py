@@ -0,0 +1,85 @@
+"""
+Venue and faculty double-booking checks, and free-slot search for venues.
+
+Two classes overlap when one starts before the other ends and ends after it
+starts. Both checks are range scans on (venue, date, start_time) or
+(faculty, date, start_time), so they only ever read one day's classes for one
+venue or one faculty member.
+"""
+from datetime import time, timedelta
+
+from django.conf import settings
+
+from .models import MakeUpClass
+
+DAY_START = getattr(settings, 'SCHEDULING_DAY_START', time(8, 0))
+DAY_END = getattr(settings, 'SCHEDULING_DAY_END', time(20, 0))
+
+
+def _overlapping(dates, start_time, end_time, exclude_pk=None):
+    classes = (MakeUpClass.objects.filter(date__in=dates, start_time__lt=end_time, end_time__gt=start_time)
+               .exclude(status='cancelled'))
+    if exclude_pk is not None:
+        classes = classes.exclude(pk=exclude_pk)
+    return classes
+
+
+def find_conflicts(dates, start_time, end_time, venue=None, faculty=None, exclude_pk=None):
+    """
+    Classes that overlap the given time slot on any of dates in the same
+    venue or with the same faculty, ordered by date and start time. Two
+    queries however many dates. exclude_pk skips the class being edited.
+    """
+    overlapping = _overlapping(dates, start_time, end_time, exclude_pk).select_related('faculty')
+    # Two indexed lookups rather than an OR, which SQLite can't serve from either index
+    conflicts = {}
+    if venue:
+        conflicts.update((cls.pk, cls) for cls in overlapping.filter(venue=venue))
+    if faculty is not None:
+        conflicts.update((cls.pk, cls) for cls in overlapping.filter(faculty=faculty))
+    return sorted(conflicts.values(), key=lambda cls: (cls.date, cls.start_time, cls.pk))
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _as_time(minutes):
+    return time(minutes // 60, minutes % 60)
+
+
+def free_slots(venue, date_from, days=14, min_minutes=30, day_start=DAY_START, day_end=DAY_END):
+    """
+    Gaps of at least min_minutes between day_start and day_end in a venue,
+    for each of the days from date_from on: {date: [(start, end), ...]}.
+    One query, then one pass over the venue's classes sorted by start.
+    """
+    date_to = date_from + timedelta(days=days - 1)
+    booked = (MakeUpClass.objects.filter(venue=venue, date__gte=date_from, date__lte=date_to)
+              .exclude(status='cancelled').order_by('date', 'start_time')
+              .values_list('date', 'start_time', 'end_time'))
+    opens, closes = _minutes(day_start), _minutes(day_end)
+    slots = {date_from + timedelta(days=i): [] for i in range(days)}
+    seen = set()
+
+    def close_day(date, cursor):
+        if closes - cursor >= min_minutes:
+            slots[date].append((_as_time(cursor), _as_time(closes)))
+
+    day, cursor = None, opens
+    for date, start_time, end_time in booked.iterator():
+        if date != day:
+            if day is not None:
+                close_day(day, cursor)
+            day, cursor = date, opens
+            seen.add(date)
+        start = min(max(_minutes(start_time), opens), closes)
+        end = min(_minutes(end_time), closes)
+        if start - cursor >= min_minutes:
+            slots[day].append((_as_time(cursor), _as_time(start)))
+        cursor = max(cursor, end)
+    if day is not None:
+        close_day(day, cursor)
+    for date in slots.keys() - seen:
+        close_day(date, opens)
+    return slots
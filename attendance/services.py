@@ -0,0 +1,176 @@
+import enum
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import code_cache, db, fragments, live
+from .models import MakeUpClass, RemedialCode, RemedialCodeSequence, MakeUpAttendance, StudentAttendanceSummary, ClassAttendanceSummary
+
+
+class MarkOutcome(enum.Enum):
+    """Result of a student's attempt to mark attendance with a code"""
+    MARKED = 'marked'
+    INVALID_CODE = 'invalid_code'
+    EXPIRED = 'expired'
+    ALREADY_MARKED = 'already_marked'
+
+
+def _code_lookup(code_str):
+    # Expired codes can be reissued; the newest row is the one that counts
+    return RemedialCode.objects.select_related('makeup_class').filter(code=code_str).order_by('-pk')
+
+
+def _checked(code_obj):
+    if code_obj is None:
+        return MarkOutcome.INVALID_CODE, None
+    if not code_obj.is_valid():
+        return MarkOutcome.EXPIRED, code_cache.entry_for(code_obj)
+    return None, code_cache.put(code_obj)
+
+
+def resolve_code(code_str):
+    """
+    (None, CachedCode) for a valid code; otherwise (INVALID_CODE, None) or
+    (EXPIRED, CachedCode). Served from the code cache when possible.
+    """
+    code = code_cache.get(code_str)
+    if code is not None:
+        return None, code
+    return _checked(_code_lookup(code_str).first())
+
+
+async def aresolve_code(code_str):
+    """resolve_code() for async views"""
+    code = code_cache.get(code_str)
+    if code is not None:
+        return None, code
+    return _checked(await _code_lookup(code_str).afirst())
+
+
+def mark_student_attendance(student, code_str):
+    """
+    Validate a remedial code and record attendance for a student.
+
+    Valid codes are served from the code cache, so a hit costs one
+    transaction: the INSERT plus the two summary updates. On a miss the code
+    is read from the database (outside the write transaction, which avoids
+    SQLite's lock-upgrade failures under bursts) and cached.
+
+    No duplicate check is made beforehand: the unique (student, makeup_class)
+    constraint decides, so racing submissions resolve to ALREADY_MARKED
+    instead of a 500. Returns (outcome, code) where code is a
+    code_cache.CachedCode, or None for unknown codes.
+    """
+    problem, code = resolve_code(code_str)
+    if problem is not None:
+        return problem, code
+
+    try:
+        with transaction.atomic():
+            record = MakeUpAttendance.objects.create(
+                student=student,
+                # Stand-in for the class, so the fragment cache receiver gets its faculty without a query
+                makeup_class=MakeUpClass(pk=code.makeup_class_id, faculty_id=code.faculty_id),
+                remedial_code_used_id=code.pk,
+                is_present=True,
+            )
+            StudentAttendanceSummary.record_marks(record.marked_at, student=student)
+            ClassAttendanceSummary.record_marks(record.marked_at, makeup_class_id=code.makeup_class_id)
+    except IntegrityError:
+        return MarkOutcome.ALREADY_MARKED, code
+    live.bump(code.makeup_class_id)
+    return MarkOutcome.MARKED, code
+
+
+def _insert_missing_marks(code, student_ids):
+    db.take_write_lock(MakeUpAttendance)
+    already = set(MakeUpAttendance.objects.filter(
+        makeup_class_id=code.makeup_class_id, student_id__in=student_ids,
+    ).values_list('student_id', flat=True))
+    records = MakeUpAttendance.objects.bulk_create([
+        MakeUpAttendance(
+            student_id=student_id,
+            makeup_class_id=code.makeup_class_id,
+            remedial_code_used_id=code.pk,
+            is_present=True,
+        )
+        for student_id in student_ids - already
+    ])
+    return {record.student_id: record.marked_at for record in records}
+
+
+def check_in_students(code, student_ids, attempts=3):
+    """
+    Record attendance for many students with one valid code (a
+    code_cache.CachedCode): one SELECT of the students already marked, one
+    bulk INSERT of the rest, then the summaries. Returns the ids that were
+    newly marked.
+    """
+    student_ids = set(student_ids)
+    if not student_ids:
+        return set()
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                marked = _insert_missing_marks(code, student_ids)
+                if marked:
+                    latest = max(marked.values())
+                    StudentAttendanceSummary.record_marks_each(latest, 'student_id', marked)
+                    ClassAttendanceSummary.record_marks(
+                        latest, count=len(marked), makeup_class_id=code.makeup_class_id,
+                    )
+            break
+        except IntegrityError:
+            # Without SQLite's database lock a student can mark between the
+            # SELECT and the INSERT; start over with them counted as marked
+            if attempt == attempts - 1:
+                raise
+    if marked:
+        live.bump(code.makeup_class_id)
+        # bulk_create sends no post_save, so the fragment receivers don't see it
+        fragments.bump('faculty', code.faculty_id)
+        fragments.bump('student', *marked)
+    return set(marked)
+
+
+def issue_codes(classes, created_by, expires_at, attempts=5):
+    """
+    Replace the live code of every class in classes, in one transaction with
+    a fixed number of queries however many classes there are: one UPDATE
+    retires the old codes, one INSERT creates the new ones. Returns the new
+    RemedialCode objects.
+    """
+    classes = list(classes)
+    if not classes:
+        return []
+    class_ids = [cls.pk for cls in classes]
+    now = timezone.now()
+    with transaction.atomic():
+        # Write first, so SQLite takes the write lock before reading
+        RemedialCode.objects.filter(makeup_class_id__in=class_ids, is_active=True).update(is_active=False)
+        # Includes codes retired earlier; dropping those from the cache is harmless
+        stale = list(RemedialCode.objects.filter(
+            makeup_class_id__in=class_ids, is_active=False, expires_at__gt=now,
+        ).values_list('pk', 'code'))
+        for attempt in range(attempts):
+            # Allocated outside the savepoint, so a retry gets fresh codes (see RemedialCode.issue)
+            code_strings = RemedialCodeSequence.allocate_codes(len(classes))
+            try:
+                with transaction.atomic():
+                    codes = RemedialCode.objects.bulk_create([
+                        RemedialCode(makeup_class=cls, created_by=created_by, expires_at=expires_at,
+                                     code=code, is_active=True)
+                        for cls, code in zip(classes, code_strings)
+                    ])
+                break
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+
+    code_cache.invalidate_many(stale)
+    for code in codes:
+        code_cache.put(code)
+        live.bump(code.makeup_class_id)
+    # bulk writes send no signals
+    fragments.bump('faculty', *{cls.faculty_id for cls in classes})
+    return codes
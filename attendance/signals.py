@@ -0,0 +1,79 @@
+"""
+Bump fragment cache stamps when the data behind a fragment changes, and
+take deleted attendance back out of the summary tables.
+"""
+import threading
+
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import fragments
+from .models import MakeUpClass, RemedialCode, MakeUpAttendance, StudentAttendanceSummary, ClassAttendanceSummary
+
+# pks of the classes a delete in progress is removing, between their
+# pre_delete and post_delete, so their cascaded attendance is not taken out
+# of the summaries a second time by attendance_deleted
+_deleting = threading.local()
+
+
+def _classes_being_deleted():
+    if not hasattr(_deleting, 'class_ids'):
+        _deleting.class_ids = set()
+    return _deleting.class_ids
+
+
+def _class_faculty_id(instance, origin=None):
+    """faculty_id of instance.makeup_class, without a query when the class is already loaded"""
+    if type(instance).makeup_class.is_cached(instance):
+        return instance.makeup_class.faculty_id
+    if isinstance(origin, MakeUpClass):
+        # Cascading from a class delete
+        return origin.faculty_id
+    return MakeUpClass.objects.filter(pk=instance.makeup_class_id).values_list('faculty_id', flat=True).first()
+
+
+@receiver(post_save, sender=MakeUpClass)
+def class_saved(sender, instance, created, **kwargs):
+    fragments.bump('faculty', instance.faculty_id)
+    if not created:
+        # Students' histories show the class subject, date and faculty
+        fragments.bump('student', *MakeUpAttendance.objects.filter(
+            makeup_class=instance).values_list('student_id', flat=True))
+
+
+@receiver(pre_delete, sender=MakeUpClass)
+def class_deleting(sender, instance, **kwargs):
+    _classes_being_deleted().add(instance.pk)
+    # One UPDATE for every attendee, rather than one per cascaded row in
+    # attendance_deleted; each student has at most one mark per class
+    StudentAttendanceSummary.remove_marks(student__in=MakeUpAttendance.objects.filter(
+        makeup_class=instance, is_present=True).values('student_id'))
+
+
+@receiver(post_delete, sender=MakeUpClass)
+def class_deleted(sender, instance, **kwargs):
+    _classes_being_deleted().discard(instance.pk)
+    fragments.bump('faculty', instance.faculty_id)
+
+
+@receiver(post_save, sender=RemedialCode)
+@receiver(post_delete, sender=RemedialCode)
+def code_changed(sender, instance, origin=None, **kwargs):
+    fragments.bump('faculty', _class_faculty_id(instance, origin))
+
+
+@receiver(post_save, sender=MakeUpAttendance)
+@receiver(post_delete, sender=MakeUpAttendance)
+def attendance_changed(sender, instance, origin=None, **kwargs):
+    fragments.bump('student', instance.student_id)
+    fragments.bump('faculty', _class_faculty_id(instance, origin))
+
+
+@receiver(post_delete, sender=MakeUpAttendance)
+def attendance_deleted(sender, instance, **kwargs):
+    if not instance.is_present or instance.makeup_class_id in _classes_being_deleted():
+        # Class deletes, however they are started, are handled by
+        # class_deleting (the class's summary row goes with it)
+        return
+    StudentAttendanceSummary.remove_marks(student_id=instance.student_id)
+    ClassAttendanceSummary.remove_marks(makeup_class_id=instance.makeup_class_id)
@@ -0,0 +1,70 @@
+"""
+Periodic housekeeping: deactivate expired codes and move classes through
+upcoming -> active -> completed by their scheduled date and times (taking
+the codes of completed classes out of use, as the complete_class action
+does).
+Run it with `manage.py sweep --loop`.
+"""
+from django.utils import timezone
+
+from . import code_cache, fragments, live
+from .models import MakeUpClass, RemedialCode
+
+SWEEP_BATCH_SIZE = 1000
+
+
+def _deactivate_in_batches(codes, batch_size):
+    touched = 0
+    while True:
+        batch = list(codes.values_list('pk', 'code', 'makeup_class_id')[:batch_size])
+        if not batch:
+            return touched
+        touched += RemedialCode.objects.filter(pk__in=[pk for pk, _, _ in batch]).update(is_active=False)
+        code_cache.invalidate_many((pk, code) for pk, code, _ in batch)
+        for makeup_class_id in {class_id for _, _, class_id in batch}:
+            live.bump(makeup_class_id)
+
+
+def deactivate_expired_codes(now, batch_size=SWEEP_BATCH_SIZE):
+    return _deactivate_in_batches(RemedialCode.objects.filter(is_active=True, expires_at__lte=now), batch_size)
+
+
+def _update_in_batches(queryset, batch_size, **changes):
+    touched = 0
+    while True:
+        batch = list(queryset.order_by().values_list('pk', 'faculty_id')[:batch_size])
+        if not batch:
+            return touched
+        touched += MakeUpClass.objects.filter(pk__in=[pk for pk, _ in batch]).update(**changes)
+        fragments.bump('faculty', *{faculty_id for _, faculty_id in batch})
+
+
+def advance_class_statuses(now, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Class dates and times are local wall-clock values. Returns (started,
+    completed, codes deactivated).
+    """
+    local = timezone.localtime(now)
+    today, time_now = local.date(), local.time()
+
+    # A date range rather than an OR, so the (status, date) index is usable
+    finished = MakeUpClass.objects.filter(
+        date__lte=today, status__in=['upcoming', 'active']
+    ).exclude(date=today, end_time__gt=time_now)
+    # Codes first, so no class is ever completed with a code still accepted
+    codes = _deactivate_in_batches(RemedialCode.objects.filter(is_active=True, makeup_class__in=finished), batch_size)
+    completed = _update_in_batches(finished, batch_size, status='completed')
+    started = _update_in_batches(
+        MakeUpClass.objects.filter(date=today, start_time__lte=time_now, end_time__gt=time_now, status='upcoming'),
+        batch_size, status='active',
+    )
+    return started, completed, codes
+
+
+def sweep(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """Run one sweep; returns the number of rows touched per kind of update"""
+    now = now or timezone.now()
+    codes = deactivate_expired_codes(now, batch_size)
+    started, completed, codes_of_completed = advance_class_statuses(now, batch_size)
+    codes += codes_of_completed
+    return {'codes_deactivated': codes, 'classes_started': started, 'classes_completed': completed}
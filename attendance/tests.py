@@ -0,0 +1,327 @@
+from datetime import time, timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import code_cache
+from .analytics import build_report
+from .archive import archive_before
+from .exports import export_querysets, iter_csv
+from .models import (
+    MakeUpClass, RemedialCode, UserProfile, StudentAttendanceSummary, ClassAttendanceSummary,
+)
+from .pagination import encode_cursor
+from .services import MarkOutcome, mark_student_attendance
+from .sweeper import sweep
+
+
+def make_user(username, role, **profile):
+    user = User.objects.create_user(username, password='pw', first_name=username.title())
+    UserProfile.objects.create(user=user, role=role, **profile)
+    return user
+
+
+class ListingQueryCountTests(TestCase):
+    """faculty_classes and the faculty dashboard run a fixed number of queries however many classes there are"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.students = [make_user(f'student{i}', 'student', registration_number=f'REG{i:04d}') for i in range(2)]
+
+    def setUp(self):
+        # Rendered fragments would hide the listing queries
+        cache.clear()
+
+    def faculty_with_classes(self, count):
+        faculty = make_user(f'faculty{count}', 'faculty')
+        today = timezone.localdate()
+        expires_at = timezone.now() + timedelta(hours=1)
+        for i in range(count):
+            makeup_class = MakeUpClass.objects.create(
+                faculty=faculty, subject=f"Subject {i}", date=today - timedelta(days=i),
+                start_time=time(9), end_time=time(10), venue=f"Room {i}",
+            )
+            code = RemedialCode.issue(makeup_class, faculty, expires_at)
+            for student in self.students:
+                mark_student_attendance(student, code.code)
+        self.client.force_login(faculty)
+        cache.clear()
+
+    def assertConstantQueries(self, url, expected):
+        for count in (3, 30):
+            with self.subTest(classes=count):
+                self.faculty_with_classes(count)
+                with self.assertNumQueries(expected):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_faculty_classes(self):
+        self.assertConstantQueries(reverse('faculty_classes'), 5)
+
+    def test_faculty_dashboard(self):
+        self.assertConstantQueries(reverse('dashboard'), 6)
+
+
+@skipUnless(connection.vendor == 'sqlite', "Reads SQLite's EXPLAIN QUERY PLAN output")
+class ListingQueryPlanTests(TestCase):
+    """Every query behind the listing pages probes an index instead of scanning a whole table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_campus', faculty=4, students=100, classes=200, attendance_per_class=20,
+                     days=60, prefix='plan', stdout=StringIO())
+        cls.faculty = User.objects.get(username='plan_fac0')
+        cls.student = User.objects.get(username='plan_stu0')
+        cls.makeup_class = MakeUpClass.objects.filter(faculty=cls.faculty, attendance_records__isnull=False).first()
+
+    def plans(self, user, url, params=None):
+        """(sql, plan lines) for each SELECT the page runs"""
+        self.client.force_login(user)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if query['sql'].startswith('SELECT'):
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.append((query['sql'], [row[-1] for row in cursor.fetchall()]))
+        return plans
+
+    def assertIndexed(self, user, url, index, params=None):
+        plans = self.plans(user, url, params)
+        for sql, plan in plans:
+            scans = [line for line in plan if line.startswith('SCAN')]
+            self.assertFalse(scans, f"Full scan in the plan of {sql}")
+        self.assertTrue(any(index in line for _, plan in plans for line in plan), f"{url} does not use {index}")
+
+    def test_faculty_listings(self):
+        makeup_class = self.makeup_class
+        record = makeup_class.attendance_records.order_by('marked_at', 'pk').first()
+        pages = [
+            (reverse('dashboard'), 'makeupclass_faculty_date_idx', None),
+            (reverse('dashboard'), 'remcode_creator_active_idx', None),
+            (reverse('faculty_classes'), 'makeupclass_faculty_date_idx', None),
+            (reverse('faculty_classes'), 'makeupclass_faculty_date_idx',
+             {'after': encode_cursor(makeup_class, ('date', 'start_time'))}),
+            (reverse('api_my_classes'), 'makeupclass_faculty_date_idx', None),
+            (reverse('class_detail', args=[makeup_class.pk]), 'attendance_class_recent_idx', None),
+            (reverse('api_class_roster', args=[makeup_class.pk]), 'attendance_class_recent_idx', None),
+            (reverse('class_attendance_since', args=[makeup_class.pk]), 'attendance_class_recent_idx',
+             {'after': record.marked_at.isoformat(), 'after_id': record.pk}),
+            (reverse('venue_free_slots'), 'makeupclass_venue_date_idx', {'venue': makeup_class.venue}),
+        ]
+        for url, index, params in pages:
+            with self.subTest(url=url, params=params):
+                self.assertIndexed(self.faculty, url, index, params)
+
+    def test_student_listings(self):
+        record = self.student.makeup_attendance.order_by('marked_at', 'pk').last()
+        pages = [
+            (reverse('dashboard'), None),
+            (reverse('my_attendance'), None),
+            (reverse('my_attendance'), {'after': encode_cursor(record, 'marked_at')}),
+            (reverse('api_my_attendance'), None),
+        ]
+        for url, params in pages:
+            with self.subTest(url=url, params=params):
+                self.assertIndexed(self.student, url, 'attendance_student_recent_idx', params)
+                self.assertIndexed(self.student, url, 'archattendance_student_idx', params)
+
+
+class SummaryDeleteTests(TestCase):
+    """Deleting marks or classes takes each mark out of the summaries exactly once"""
+
+    def setUp(self):
+        self.student = make_user('student', 'student', registration_number='REG0001')
+        self.faculty = make_user('faculty', 'faculty')
+        other_faculty = make_user('other', 'faculty')
+        expires_at = timezone.now() + timedelta(hours=1)
+        self.classes = []
+        for i, faculty in enumerate((self.faculty, other_faculty)):
+            makeup_class = MakeUpClass.objects.create(
+                faculty=faculty, subject=f"Subject {i}", date=timezone.localdate(),
+                start_time=time(9 + i), end_time=time(10 + i), venue="Room 1",
+            )
+            mark_student_attendance(self.student, RemedialCode.issue(makeup_class, faculty, expires_at).code)
+            self.classes.append(makeup_class)
+
+    def assertPresentCount(self, expected):
+        self.assertEqual(self.student.makeup_attendance.filter(is_present=True).count(), expected)
+        self.assertEqual(StudentAttendanceSummary.objects.get(student=self.student).present_count, expected)
+
+    def test_attendance_delete(self):
+        self.student.makeup_attendance.get(makeup_class=self.classes[0]).delete()
+        self.assertPresentCount(1)
+        self.assertEqual(ClassAttendanceSummary.objects.get(makeup_class=self.classes[0]).present_count, 0)
+
+    def test_class_delete(self):
+        self.classes[0].delete()
+        self.assertPresentCount(1)
+
+    def test_class_queryset_delete(self):
+        MakeUpClass.objects.filter(pk=self.classes[0].pk).delete()
+        self.assertPresentCount(1)
+
+    def test_faculty_delete(self):
+        self.faculty.delete()
+        self.assertPresentCount(1)
+
+
+class CheckInRateLimitTests(TestCase):
+    """api/check-in/ is throttled like mark_attendance, so codes cannot be brute-forced through it"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_limit(self):
+        self.client.force_login(make_user('student', 'student', registration_number='REG0001'))
+        limit, _ = settings.RATE_LIMITS['check_in']['user']
+        for _ in range(limit):
+            response = self.client.post(reverse('check_in'), {'code': 'AAAAAA'}, content_type='application/json')
+            self.assertNotEqual(response.status_code, 429)
+        response = self.client.post(reverse('check_in'), {'code': 'AAAAAA'}, content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+
+
+class ArchivedReportingTests(TestCase):
+    """Exports and analytics cover classes archive_semester has moved out of the live tables"""
+
+    def setUp(self):
+        faculty = make_user('faculty', 'faculty', department='CSE')
+        students = [make_user(f'student{i}', 'student', registration_number=f'REG{i:04d}', department='CSE')
+                    for i in range(3)]
+        expires_at = timezone.now() + timedelta(hours=1)
+        for i in range(4):
+            makeup_class = MakeUpClass.objects.create(
+                faculty=faculty, subject=f"Subject {i % 2}", date=timezone.localdate() - timedelta(days=i),
+                start_time=time(9), end_time=time(10), venue="Room 1",
+            )
+            code = RemedialCode.issue(makeup_class, faculty, expires_at)
+            for student in students[:i + 1]:
+                mark_student_attendance(student, code.code)
+        self.date_from = timezone.localdate() - timedelta(days=10)
+        self.date_to = timezone.localdate()
+
+    def snapshot(self):
+        report = build_report(self.date_from, self.date_to)
+        del report['generated_at']
+        export = list(iter_csv(export_querysets(date_from=self.date_from, date_to=self.date_to)))
+        return report, export
+
+    def test_archived_classes_are_included(self):
+        before = self.snapshot()
+        self.assertEqual(len(before[1]), 1 + 9)
+        MakeUpClass.objects.filter(date__lt=timezone.localdate()).update(status='completed')
+        moved = list(archive_before(timezone.localdate()))
+        self.assertEqual(sum(classes for classes, _, _ in moved), 3)
+        after = self.snapshot()
+        self.assertEqual(after[0], before[0])
+        self.assertCountEqual(after[1], before[1])
+
+
+class AnalyticsScopeTests(TestCase):
+    """Faculty who are not staff only see analytics for their own classes"""
+
+    def setUp(self):
+        cache.clear()
+        self.faculty = make_user('faculty', 'faculty', department='CSE')
+        self.other = make_user('other', 'faculty', department='ECE')
+        for faculty in (self.faculty, self.other):
+            MakeUpClass.objects.create(
+                faculty=faculty, subject=f"{faculty.username} subject", date=timezone.localdate(),
+                start_time=time(9), end_time=time(10), venue="Room 1",
+            )
+
+    def report(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse('analytics'), {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_faculty_sees_own_classes(self):
+        report = self.report(self.faculty)
+        self.assertEqual([row['faculty'] for row in report['per_faculty']], ['faculty'])
+        self.assertEqual([row['subject'] for row in report['per_class']], ['faculty subject'])
+
+    def test_staff_sees_every_class(self):
+        self.faculty.is_staff = True
+        self.faculty.save()
+        report = self.report(self.faculty)
+        self.assertCountEqual([row['faculty'] for row in report['per_faculty']], ['faculty', 'other'])
+
+
+class SweeperTests(TestCase):
+    """Classes the sweeper completes end up like ones completed from class_detail"""
+
+    def test_completing_a_class_deactivates_its_codes(self):
+        faculty = make_user('faculty', 'faculty')
+        makeup_class = MakeUpClass.objects.create(
+            faculty=faculty, subject="Subject", date=timezone.localdate() - timedelta(days=1),
+            start_time=time(9), end_time=time(10), venue="Room 1",
+        )
+        code = RemedialCode.issue(makeup_class, faculty, timezone.now() + timedelta(hours=1))
+        code_cache.put(code)
+
+        self.assertEqual(sweep(), {'codes_deactivated': 1, 'classes_started': 0, 'classes_completed': 1})
+        code.refresh_from_db()
+        self.assertFalse(code.is_active)
+        student = make_user('student', 'student', registration_number='REG0001')
+        outcome, _ = mark_student_attendance(student, code.code)
+        self.assertIsNot(outcome, MarkOutcome.MARKED)
+
+
+class SessionBackendTests(TestCase):
+    """Sessions logged in before ProfileBackend was added survive the deploy"""
+
+    def test_session_from_model_backend_still_resolves(self):
+        user = make_user('student', 'student', registration_number='REG0001')
+        self.client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, user)
+
+
+class ClassListingOrderTests(TestCase):
+    """Faculty class listings run newest first by date, then start time"""
+
+    def setUp(self):
+        cache.clear()
+        self.faculty = make_user('faculty', 'faculty')
+        today = timezone.localdate()
+        # Created out of time order, so creation order and pk would give a different listing
+        for date, hour in ((today, 14), (today, 9), (today, 11), (today - timedelta(days=1), 16),
+                           (today + timedelta(days=1), 8)):
+            MakeUpClass.objects.create(
+                faculty=self.faculty, subject=f"{date} {hour}", date=date,
+                start_time=time(hour), end_time=time(hour + 1), venue="Room 1",
+            )
+        self.expected = list(MakeUpClass.objects.order_by('-date', '-start_time').values_list('pk', flat=True))
+        self.client.force_login(self.faculty)
+
+    def test_faculty_classes(self):
+        response = self.client.get(reverse('faculty_classes'))
+        self.assertEqual([cls.pk for cls in response.context['classes']], self.expected)
+
+    def test_api_pages(self):
+        pks, params = [], {'limit': 2}
+        while True:
+            page = self.client.get(reverse('api_my_classes'), params).json()
+            pks += [row['id'] for row in page['results']]
+            if not page['next']:
+                break
+            params['after'] = page['next']
+        self.assertEqual(pks, self.expected)
+
+        previous = self.client.get(reverse('api_my_classes'), {'limit': 2, 'before': page['previous']}).json()
+        self.assertEqual([row['id'] for row in previous['results']], self.expected[2:4])
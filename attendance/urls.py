@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -14,11 +14,28 @@ urlpatterns = [
     path('classes/<int:pk>/', views.class_detail, name='class_detail'),
     path('classes/<int:pk>/edit/', views.edit_class, name='edit_class'),
     path('classes/<int:pk>/delete/', views.delete_class, name='delete_class'),
+    path('classes/today/codes/', views.generate_todays_codes, name='generate_todays_codes'),
+    path('analytics/', views.analytics_view, name='analytics'),
+    path('classes/export/', views.export_attendance, name='export_attendance'),
 
     # Student
     path('attendance/mark/', views.mark_attendance, name='mark_attendance'),
     path('attendance/my/', views.my_attendance, name='my_attendance'),
 
     # AJAX
+    path('api/check-in/', views.check_in, name='check_in'),
     path('api/code/<int:pk>/status/', views.check_code_status, name='check_code_status'),
+    path('api/classes/<int:pk>/attendance/', views.class_attendance_since, name='class_attendance_since'),
+    path('api/classes/<int:pk>/live/', views.class_live_stream, name='class_live_stream'),
+    path('api/venues/free-slots/', views.venue_free_slots, name='venue_free_slots'),
+    path('api/code-cache/stats/', views.code_cache_stats, name='code_cache_stats'),
+    path('api/fragment-cache/stats/', views.fragment_cache_stats, name='fragment_cache_stats'),
+
+    # JSON API (mobile app)
+    path('api/me/attendance/', api.my_attendance, name='api_my_attendance'),
+    path('api/me/classes/', api.my_classes, name='api_my_classes'),
+    path('api/classes/<int:pk>/roster/', api.class_roster, name='api_class_roster'),
+
+    # Monitoring
+    path('metrics', views.metrics_view, name='metrics'),
 ]
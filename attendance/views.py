@@ -1,14 +1,39 @@
+import json
+
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib import messages
 from django.utils import timezone
+from django.utils.dateformat import format as date_format
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from django.db import transaction
+from django.db.models import Q
 from datetime import timedelta
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+
+from .models import MakeUpClass, RemedialCode, MakeUpAttendance, UserProfile, StudentAttendanceSummary
+from .forms import (
+    RegisterForm, MakeUpClassForm, MakeUpClassSeriesForm, RemedialCodeForm, AttendanceMarkForm, AttendanceExportForm,
+    FreeSlotsForm, AnalyticsForm,
+)
+from .exports import export_querysets, iter_csv
+from .pagination import keyset_paginate
+from .scheduling import free_slots
+from .services import MarkOutcome, aresolve_code, check_in_students, issue_codes, mark_student_attendance
+from . import analytics, archive, code_cache, fragments, live, metrics
 
-from .models import MakeUpClass, RemedialCode, MakeUpAttendance, UserProfile
-from .forms import RegisterForm, MakeUpClassForm, RemedialCodeForm, AttendanceMarkForm
+
+def _profile_or_404(request):
+    """The profile ProfileMiddleware attached to the request"""
+    if request.profile is None:
+        raise Http404("No UserProfile matches the given query.")
+    return request.profile
 
 
 # ──────────────────────────────────────────────
@@ -73,30 +98,44 @@ def logout_view(request):
 
 @login_required
 def dashboard(request):
-    profile = getattr(request.user, 'profile', None)
+    profile = request.profile
     if not profile:
         messages.warning(request, "Please complete your profile setup.")
         return redirect('login')
 
     if profile.is_faculty():
-        classes = MakeUpClass.objects.filter(faculty=request.user).order_by('-date')[:5]
+        recent_classes = fragments.render(
+            request, 'faculty_recent_classes', 'attendance/fragments/faculty_recent_classes.html',
+            stamps=[('faculty', request.user.pk)],
+            get_context=lambda: {
+                'classes': MakeUpClass.objects.filter(faculty=request.user).with_listing_stats().order_by('-date')[:5],
+            },
+        )
         total_classes = MakeUpClass.objects.filter(faculty=request.user).count()
+        # Not cached: the list changes as codes expire
         active_codes = RemedialCode.objects.filter(
-            created_by=request.user, is_active=True
+            created_by=request.user, is_active=True, expires_at__gt=timezone.now()
         ).select_related('makeup_class')
         context = {
-            'classes': classes,
+            'recent_classes': recent_classes,
             'total_classes': total_classes,
             'active_codes': active_codes,
             'role': 'faculty',
         }
     else:
-        attended = MakeUpAttendance.objects.filter(
-            student=request.user, is_present=True
-        ).select_related('makeup_class').order_by('-marked_at')[:5]
-        total_attended = MakeUpAttendance.objects.filter(student=request.user, is_present=True).count()
+        recent_attendance = fragments.render(
+            request, 'student_recent_attendance', 'attendance/fragments/student_recent_attendance.html',
+            stamps=[('student', request.user.pk)],
+            get_context=lambda: {
+                'attended': keyset_paginate([
+                    queryset.filter(is_present=True).select_related('makeup_class__faculty')
+                    for queryset in archive.history_querysets(request.user)
+                ], 'marked_at', {}, parse_datetime, page_size=5).items,
+            },
+        )
+        total_attended = StudentAttendanceSummary.present_count_for(student=request.user)
         context = {
-            'attended': attended,
+            'recent_attendance': recent_attendance,
             'total_attended': total_attended,
             'role': 'student',
         }
@@ -111,48 +150,80 @@ def dashboard(request):
 @login_required
 def schedule_class(request):
     """Faculty: schedule a new make-up class"""
-    profile = get_object_or_404(UserProfile, user=request.user)
+    profile = _profile_or_404(request)
     if not profile.is_faculty():
         messages.error(request, "Only faculty can schedule make-up classes.")
         return redirect('dashboard')
 
     if request.method == 'POST':
-        form = MakeUpClassForm(request.POST)
+        form = MakeUpClassSeriesForm(request.POST, faculty=request.user)
         if form.is_valid():
+            if len(form.occurrence_dates(form.cleaned_data)) > 1:
+                with transaction.atomic():
+                    classes = form.save_series(request.user)
+                # bulk_create sends no post_save
+                fragments.bump('faculty', request.user.pk)
+                messages.success(request, f"Scheduled {len(classes)} weekly '{classes[0].subject}' classes, "
+                                          f"{classes[0].date:%d %b} to {classes[-1].date:%d %b %Y}.")
+                return redirect('faculty_classes')
             cls = form.save(commit=False)
             cls.faculty = request.user
             cls.save()
             messages.success(request, f"Make-up class for '{cls.subject}' scheduled successfully!")
             return redirect('class_detail', pk=cls.pk)
     else:
-        form = MakeUpClassForm()
+        form = MakeUpClassSeriesForm(faculty=request.user)
     return render(request, 'attendance/schedule_class.html', {'form': form})
 
 
 @login_required
 def faculty_classes(request):
     """Faculty: list all their make-up classes"""
-    profile = get_object_or_404(UserProfile, user=request.user)
+    profile = _profile_or_404(request)
     if not profile.is_faculty():
         return redirect('dashboard')
-    classes = MakeUpClass.objects.filter(faculty=request.user).order_by('-date')
-    return render(request, 'attendance/faculty_classes.html', {'classes': classes})
+
+    def get_context():
+        classes = MakeUpClass.objects.filter(faculty=request.user).with_listing_stats()
+        return {
+            'classes': keyset_paginate(classes, ('date', 'start_time'), request.GET, (parse_date, parse_time)),
+            # Counted on the (faculty, date, start_time) index, never the table
+            'total': MakeUpClass.objects.filter(faculty=request.user).count(),
+        }
+
+    def until_a_code_expires(context):
+        """The 'Code Live' badges must disappear when their codes expire"""
+        now = timezone.now()
+        expiries = [code.expires_at for cls in context['classes'] for code in cls.active_codes
+                    if code.expires_at > now]
+        return int((min(expiries) - now).total_seconds()) if expiries else fragments.FRAGMENT_TIMEOUT
+
+    classes_table = fragments.render(
+        request, 'faculty_classes', 'attendance/fragments/faculty_classes.html',
+        stamps=[('faculty', request.user.pk)], get_context=get_context,
+        vary=request.GET.urlencode(), timeout_for=until_a_code_expires,
+    )
+    return render(request, 'attendance/faculty_classes.html', {'classes_table': classes_table})
 
 
 @login_required
 def class_detail(request, pk):
     """Faculty: detail view for a make-up class, generate code, see attendance"""
     cls = get_object_or_404(MakeUpClass, pk=pk)
-    profile = get_object_or_404(UserProfile, user=request.user)
+    profile = _profile_or_404(request)
 
     # Only faculty who owns the class or any student can see it
-    if profile.is_faculty() and cls.faculty != request.user:
+    if profile.is_faculty() and cls.faculty_id != request.user.pk:
         messages.error(request, "Access denied.")
         return redirect('dashboard')
 
-    attendance_records = MakeUpAttendance.objects.filter(
+    # One query for both the rows and the count; newest first
+    attendance_records = list(MakeUpAttendance.objects.filter(
         makeup_class=cls
-    ).select_related('student').order_by('-marked_at')
+    ).select_related('student__profile', 'remedial_code_used').order_by('-marked_at', '-pk'))
+    roster_cursor = None
+    if attendance_records:
+        roster_cursor = {'after': attendance_records[0].marked_at.isoformat(), 'after_id': attendance_records[0].pk}
 
     active_code = cls.get_active_code()
     code_form = RemedialCodeForm()
@@ -164,19 +235,20 @@ def class_detail(request, pk):
             code_form = RemedialCodeForm(request.POST)
             if code_form.is_valid():
                 # Deactivate old codes
-                cls.remedial_codes.filter(is_active=True).update(is_active=False)
+                cls.deactivate_codes()
                 duration = int(code_form.cleaned_data['duration_minutes'])
-                RemedialCode.objects.create(
+                new_code = RemedialCode.issue(
                     makeup_class=cls,
                     created_by=request.user,
                     expires_at=timezone.now() + timedelta(minutes=duration),
-                    is_active=True,
                 )
+                code_cache.put(new_code)
+                live.bump(cls.pk)
                 messages.success(request, "New remedial code generated!")
                 return redirect('class_detail', pk=pk)
 
         elif action == 'deactivate_code':
-            cls.remedial_codes.filter(is_active=True).update(is_active=False)
+            cls.deactivate_codes()
             messages.info(request, "Remedial code deactivated.")
             return redirect('class_detail', pk=pk)
 
@@ -187,7 +259,7 @@ def class_detail(request, pk):
 
         elif action == 'complete_class':
             cls.status = 'completed'
-            cls.remedial_codes.filter(is_active=True).update(is_active=False)
+            cls.deactivate_codes()
             cls.save()
             messages.success(request, "Class marked as completed.")
             return redirect('class_detail', pk=pk)
@@ -195,6 +267,7 @@ def class_detail(request, pk):
     context = {
         'cls': cls,
         'attendance_records': attendance_records,
+        'roster_cursor': roster_cursor,
         'active_code': active_code,
         'code_form': code_form,
         'role': profile.role,
@@ -216,16 +289,115 @@ def edit_class(request, pk):
     return render(request, 'attendance/schedule_class.html', {'form': form, 'editing': True})
 
 
+@login_required
+def generate_todays_codes(request):
+    """Faculty: issue fresh codes for all of today's open classes at once"""
+    profile = _profile_or_404(request)
+    if not profile.is_faculty() or request.method != 'POST':
+        return redirect('dashboard')
+    form = RemedialCodeForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, "Choose how long the codes should stay valid.")
+        return redirect('dashboard')
+
+    classes = MakeUpClass.objects.filter(
+        faculty=request.user, date=timezone.localdate(),
+    ).exclude(status__in=['completed', 'cancelled'])
+    duration = int(form.cleaned_data['duration_minutes'])
+    codes = issue_codes(classes, request.user, timezone.now() + timedelta(minutes=duration))
+    if codes:
+        messages.success(request, f"Generated codes for {len(codes)} of today's classes.")
+    else:
+        messages.info(request, "You have no open classes today.")
+    return redirect('dashboard')
+
+
+@login_required
+def venue_free_slots(request):
+    """Faculty: free gaps in a venue's schedule over the coming days, as JSON"""
+    profile = _profile_or_404(request)
+    if not profile.is_faculty():
+        return JsonResponse({'error': "Only faculty can search for free slots."}, status=403)
+    form = FreeSlotsForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    query = form.cleaned_data
+    slots = free_slots(query['venue'], query['date_from'], days=query['days'], min_minutes=query['min_minutes'])
+    return JsonResponse({
+        'venue': query['venue'],
+        'min_minutes': query['min_minutes'],
+        'days': [
+            {
+                'date': date.isoformat(),
+                'free': [{'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')} for start, end in gaps],
+            }
+            for date, gaps in slots.items()
+        ],
+    })
+
+
 @login_required
 def delete_class(request, pk):
     cls = get_object_or_404(MakeUpClass, pk=pk, faculty=request.user)
     if request.method == 'POST':
+        cls.deactivate_codes()
         cls.delete()
         messages.success(request, "Make-up class deleted.")
         return redirect('faculty_classes')
     return render(request, 'attendance/confirm_delete.html', {'cls': cls})
 
 
+@login_required
+def export_attendance(request):
+    """Staff/faculty: stream attendance records as CSV; faculty only get their own classes"""
+    profile = request.profile
+    if not request.user.is_staff and not (profile and profile.is_faculty()):
+        messages.error(request, "Only faculty can export attendance.")
+        return redirect('dashboard')
+
+    form = AttendanceExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    filters = form.cleaned_data
+    if not request.user.is_staff:
+        filters['faculty'] = request.user.username
+
+    response = StreamingHttpResponse(iter_csv(export_querysets(**filters)), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="makeup_attendance.csv"'
+    return response
+
+
+# ──────────────────────────────────────────────
+#  Analytics
+# ──────────────────────────────────────────────
+
+@login_required
+def analytics_view(request):
+    """Staff/faculty: attendance rates per class, faculty, department, subject and week; faculty only get their own classes"""
+    profile = request.profile
+    if not request.user.is_staff and not (profile and profile.is_faculty()):
+        messages.error(request, "Only faculty can view attendance analytics.")
+        return redirect('dashboard')
+
+    form = AnalyticsForm(request.GET)
+    as_json = request.GET.get('format') == 'json'
+    if not form.is_valid():
+        if as_json:
+            return JsonResponse({'errors': form.errors}, status=400)
+        return render(request, 'attendance/analytics.html', {'form': form})
+    query = form.cleaned_data
+    report = analytics.get_report(
+        query['date_from'], query['date_to'],
+        threshold=query['threshold'] if query['threshold'] is not None else analytics.DEFAULT_THRESHOLD,
+        faculty=None if request.user.is_staff else request.user.pk,
+        # Rebuilding scans a lot; only staff may skip the cache
+        refresh=query['refresh'] and request.user.is_staff,
+    )
+    if as_json:
+        return JsonResponse(report)
+    return render(request, 'attendance/analytics.html', {'form': form, 'report': report})
+
+
 # ──────────────────────────────────────────────
 #  Student: Mark Attendance
 # ──────────────────────────────────────────────
@@ -233,7 +405,7 @@ def delete_class(request, pk):
 @login_required
 def mark_attendance(request):
     """Student: enter remedial code to mark attendance"""
-    profile = get_object_or_404(UserProfile, user=request.user)
+    profile = _profile_or_404(request)
     if not profile.is_student():
         messages.error(request, "Only students can mark attendance.")
         return redirect('dashboard')
@@ -242,29 +414,21 @@ def mark_attendance(request):
         form = AttendanceMarkForm(request.POST)
         if form.is_valid():
             code_str = form.cleaned_data['code']
-            try:
-                code_obj = RemedialCode.objects.select_related('makeup_class').get(code=code_str)
-            except RemedialCode.DoesNotExist:
+            outcome, code = mark_student_attendance(request.user, code_str)
+
+            if outcome is MarkOutcome.INVALID_CODE:
                 messages.error(request, f"Code '{code_str}' is not valid. Please check and try again.")
                 return render(request, 'attendance/mark_attendance.html', {'form': form})
 
-            if not code_obj.is_valid():
+            if outcome is MarkOutcome.EXPIRED:
                 messages.error(request, "This code has expired or been deactivated. Ask your faculty for a new code.")
                 return render(request, 'attendance/mark_attendance.html', {'form': form})
 
-            cls = code_obj.makeup_class
-            # Check duplicate
-            if MakeUpAttendance.objects.filter(student=request.user, makeup_class=cls).exists():
-                messages.warning(request, f"You have already marked attendance for '{cls.subject}'.")
+            if outcome is MarkOutcome.ALREADY_MARKED:
+                messages.warning(request, f"You have already marked attendance for '{code.subject}'.")
                 return redirect('my_attendance')
 
-            MakeUpAttendance.objects.create(
-                student=request.user,
-                makeup_class=cls,
-                remedial_code_used=code_obj,
-                is_present=True,
-            )
-            messages.success(request, f"✅ Attendance marked for '{cls.subject}' on {cls.date}!")
+            messages.success(request, f"✅ Attendance marked for '{code.subject}' on {code.date}!")
             return redirect('my_attendance')
     else:
         form = AttendanceMarkForm()
@@ -275,17 +439,89 @@ def mark_attendance(request):
 @login_required
 def my_attendance(request):
     """Student: view their own make-up class attendance records"""
-    profile = get_object_or_404(UserProfile, user=request.user)
+    profile = _profile_or_404(request)
     if not profile.is_student():
         return redirect('dashboard')
 
-    records = MakeUpAttendance.objects.filter(
-        student=request.user
-    ).select_related('makeup_class', 'makeup_class__faculty').order_by('-marked_at')
+    # Live and archived records share field names, so one template renders both
+    records = [
+        queryset.select_related('makeup_class', 'makeup_class__faculty', 'remedial_code_used')
+        for queryset in archive.history_querysets(request.user)
+    ]
 
     return render(request, 'attendance/my_attendance.html', {
-        'records': records,
-        'total': records.count(),
+        'records': keyset_paginate(records, 'marked_at', request.GET, parse_datetime),
+        'total': StudentAttendanceSummary.present_count_for(student=request.user),
+    })
+
+
+# ──────────────────────────────────────────────
+#  Kiosk / QR Check-In (JSON)
+# ──────────────────────────────────────────────
+
+CHECK_IN_MAX_BATCH = getattr(settings, 'CHECK_IN_MAX_BATCH', 500)
+
+
+async def check_in(request):
+    """
+    JSON check-in for kiosks and QR scanners. A student posts {"code"} to
+    mark themselves; the faculty who owns the class posts {"code",
+    "registration_number"} or {"code", "registration_numbers": [...]}, e.g.
+    to sync a batch of offline scans in one request.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': "POST a JSON body."}, status=405)
+    # ProfileMiddleware has already loaded the user, so this is no query
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': "Authentication required."}, status=401)
+    try:
+        body = json.loads(request.body)
+        code_str = str(body['code']).strip().upper()
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': 'Expected a JSON object with a "code".'}, status=400)
+
+    numbers = body.get('registration_numbers')
+    if numbers is None and body.get('registration_number') is not None:
+        numbers = [body['registration_number']]
+
+    if numbers is None:
+        if request.role != 'student':
+            return JsonResponse({'error': "Only students can check themselves in."}, status=403)
+        outcome, code = await sync_to_async(mark_student_attendance)(request.user, code_str)
+        return JsonResponse({
+            'status': outcome.value,
+            'class': code.makeup_class_id if code else None,
+            'subject': code.subject if code else None,
+        })
+
+    if not isinstance(numbers, list) or not 0 < len(numbers) <= CHECK_IN_MAX_BATCH:
+        return JsonResponse({'error': f"registration_numbers must be a list of 1 to {CHECK_IN_MAX_BATCH}."},
+                            status=400)
+    numbers = {str(number).strip() for number in numbers}
+    problem, code = await aresolve_code(code_str)
+    if problem is not None:
+        return JsonResponse({'status': problem.value, 'class': code.makeup_class_id if code else None})
+    if code.faculty_id != request.user.pk:
+        return JsonResponse({'error': "Only the faculty who owns the class can check students in."}, status=403)
+
+    students = {
+        number: user_id
+        async for number, user_id in UserProfile.objects.filter(
+            role='student', registration_number__in=numbers,
+        ).values_list('registration_number', 'user_id')
+    }
+    marked = await sync_to_async(check_in_students)(code, students.values())
+    results = {
+        number: 'unknown_student' if number not in students
+        else MarkOutcome.MARKED.value if students[number] in marked
+        else MarkOutcome.ALREADY_MARKED.value
+        for number in sorted(numbers)
+    }
+    return JsonResponse({
+        'status': 'ok',
+        'class': code.makeup_class_id,
+        'marked': len(marked),
+        'results': results,
     })
 
 
@@ -296,8 +532,17 @@ def my_attendance(request):
 @login_required
 def check_code_status(request, pk):
     """AJAX endpoint to check if active code still valid"""
+    cached = code_cache.get_by_pk(pk)
+    if cached is not None:
+        return JsonResponse({
+            'is_valid': True,
+            'expires_at': cached.expires_at.isoformat(),
+            'time_left': cached.time_left(),
+        })
     try:
-        code = RemedialCode.objects.get(pk=pk)
+        code = RemedialCode.objects.select_related('makeup_class').get(pk=pk)
+        if code.is_valid():
+            code_cache.put(code)
         return JsonResponse({
             'is_valid': code.is_valid(),
             'expires_at': code.expires_at.isoformat(),
@@ -305,3 +550,84 @@ def check_code_status(request, pk):
         })
     except RemedialCode.DoesNotExist:
         return JsonResponse({'is_valid': False})
+
+
+ROSTER_BATCH_SIZE = 200
+
+
+@login_required
+def class_attendance_since(request, pk):
+    """AJAX: attendance records marked after a (marked_at, id) cursor, oldest first"""
+    cls = get_object_or_404(MakeUpClass, pk=pk, faculty=request.user)
+    records = MakeUpAttendance.objects.filter(makeup_class=cls)
+
+    try:
+        after = parse_datetime(request.GET.get('after', ''))
+    except ValueError:
+        after = None
+    after_id = request.GET.get('after_id', '')
+    if after and after_id.isdigit():
+        records = records.filter(Q(marked_at__gt=after) | Q(marked_at=after, pk__gt=int(after_id)))
+
+    rows = list(records.order_by('marked_at', 'pk').values(
+        'pk', 'marked_at', 'student__username', 'student__first_name', 'student__last_name',
+        'student__profile__registration_number', 'remedial_code_used__code',
+    )[:ROSTER_BATCH_SIZE + 1])
+    has_more = len(rows) > ROSTER_BATCH_SIZE
+    rows = rows[:ROSTER_BATCH_SIZE]
+
+    cursor = None
+    if rows:
+        cursor = {'after': rows[-1]['marked_at'].isoformat(), 'after_id': rows[-1]['pk']}
+    return JsonResponse({
+        'records': [{
+            'id': row['pk'],
+            'student': f"{row['student__first_name']} {row['student__last_name']}".strip() or row['student__username'],
+            'registration_number': row['student__profile__registration_number'] or '',
+            'marked_at': date_format(timezone.localtime(row['marked_at']), 'd M, h:i A'),
+            'code': row['remedial_code_used__code'] or '',
+        } for row in rows],
+        'cursor': cursor,
+        'has_more': has_more,
+    })
+
+
+async def class_live_stream(request, pk):
+    """Faculty: Server-Sent Events with the class's code status and attendance count"""
+    user = await sync_to_async(lambda: request.user if request.user.is_authenticated else None)()
+    if user is None:
+        return HttpResponse(status=401)
+    if not await MakeUpClass.objects.filter(pk=pk, faculty=user).aexists():
+        return HttpResponse(status=404)
+
+    response = StreamingHttpResponse(
+        live.stream(
+            pk,
+            last_event_id=request.headers.get('Last-Event-ID'),
+            once=not isinstance(request, ASGIRequest),
+        ),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@staff_member_required
+def code_cache_stats(request):
+    """Staff: hit/miss counters of the remedial code cache in this process"""
+    return JsonResponse(code_cache.stats())
+
+
+@staff_member_required
+def fragment_cache_stats(request):
+    """Staff: hit/miss counters and hit ratios of the rendered fragment cache in this process"""
+    return JsonResponse(fragments.stats())
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; staff or METRICS_ALLOWED_IPS only"""
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if not request.user.is_staff and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
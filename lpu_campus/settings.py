@@ -3,6 +3,7 @@ LPU Smart Campus Management System
 Django Settings
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,10 +26,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'attendance.middleware.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'attendance.middleware.RateLimitMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'attendance.middleware.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -52,16 +56,74 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'lpu_campus.wsgi.application'
+# Serve through lpu_campus.asgi (e.g. uvicorn) so the live class stream stays
+# open; under WSGI it falls back to a long-poll of at most
+# LIVE_STREAM_LONG_POLL_SECONDS (25) per request.
 
-DATABASES = {
+# DB_ENGINE=postgresql (with DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT)
+# for production; the default is SQLite at db.sqlite3, tuned by attendance.db.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'lpu_campus'),
+            'USER': os.environ.get('DB_USER', 'lpu_campus'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Keep connections open between requests; check them before reuse
+            # so a restarted server or dropped connection doesn't surface as a 500
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        }
+    }
+
+# Applied to every new SQLite connection (see attendance/db.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+}
+
+# locmem is per-process; point this at Redis/Memcached when running several
+# workers so remedial code invalidation reaches all of them.
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lpu-campus',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# ProfileBackend loads request.user together with its profile
+# (select_related). ModelBackend stays after it so sessions logged in before
+# ProfileBackend existed, which name ModelBackend, still resolve.
+AUTHENTICATION_BACKENDS = [
+    'attendance.backends.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# SESSION_STORE=cached_db (default) reads sessions from the cache and writes
+# through to the database; signed_cookies keeps them client-side with no
+# storage at all, but sessions can't be revoked server-side before expiry.
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.environ.get('SESSION_STORE', 'cached_db')]
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'Asia/Kolkata'
 USE_I18N = True
@@ -70,6 +132,40 @@ USE_TZ = True
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Requests running more SQL queries than this are logged as warnings
+QUERY_BUDGET = 50
+# Clients allowed to scrape /metrics without a staff login
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Sliding-window request limits per URL name: (requests, window seconds).
+# 'user' applies to logged-in requests, 'ip' only to anonymous ones
+# (REMOTE_ADDR, so set it from the proxy's X-Forwarded-For when running
+# behind one). Never limit logged-in requests per IP: a whole campus can sit
+# behind one NAT address, and a hall of 200+ students marks within a minute.
+RATE_LIMITS = {
+    'mark_attendance': {'methods': ['POST'], 'user': (10, 60), 'ip': (300, 60)},
+    'check_code_status': {'user': (60, 60), 'ip': (1200, 60)},
+    # Takes the same code guesses as mark_attendance; a faculty kiosk posts
+    # one request per scan, so it needs about one a second
+    'check_in': {'methods': ['POST'], 'user': (60, 60), 'ip': (300, 60)},
+}
+
+# Rows per page on my_attendance and faculty_classes
+LISTING_PAGE_SIZE = 25
+
+# How long an analytics report is served from the cache before it is rebuilt;
+# `manage.py attendance_report --refresh` rebuilds it ahead of time
+ANALYTICS_CACHE_SECONDS = 15 * 60
+ANALYTICS_LOW_ATTENDANCE_THRESHOLD = 0.75
+
+# Upper bound on how long rendered dashboard/class list fragments are cached;
+# edits invalidate them sooner (see attendance/fragments.py)
+FRAGMENT_CACHE_SECONDS = 300
+
+# `manage.py archive_semester` moves completed classes older than this
+# (with their codes and attendance) into the archive tables
+ARCHIVE_AFTER_DAYS = 180
+
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'
 LOGOUT_REDIRECT_URL = '/login/'